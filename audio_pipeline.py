@@ -0,0 +1,387 @@
+"""In-memory audio helpers shared by the live capture path.
+
+Captured PyAudio frames are 16-bit PCM; Whisper wants mono float32 in
+[-1, 1] at 16 kHz. Everything here works on numpy buffers directly so the
+capture loop never has to touch the filesystem.
+"""
+import math
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pipeline_metrics import NULL_METRICS
+
+WHISPER_RATE = 16000
+INT16_SCALE = 1.0 / 32768.0
+
+# PortAudio constants (pyaudio.paInt16, pyaudio.paInputOverflowed), kept here
+# so an injected PyAudio stand-in works without PortAudio installed
+PA_INT16 = 8
+PA_INPUT_OVERFLOWED = -9981
+# Channels opened in native-format capture (the first ones on the device)
+MAX_CAPTURE_CHANNELS = 2
+
+
+def pcm16_to_float32(data, out=None):
+    """Convert raw int16 PCM bytes to normalized float32 samples.
+
+    When ``out`` is given the result is written into it (it must hold at
+    least as many samples as ``data``) and the filled slice is returned.
+    """
+    pcm = np.frombuffer(data, dtype=np.int16)
+    if out is None:
+        out = np.empty(len(pcm), dtype=np.float32)
+    dst = out[:len(pcm)]
+    np.multiply(pcm, INT16_SCALE, out=dst, dtype=np.float32)
+    return dst
+
+
+def downmix(samples, channels):
+    """Average interleaved ``channels`` down to mono."""
+    if channels == 1:
+        return samples
+    return samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+
+class StreamingResampler:
+    """Stateful polyphase FIR resampler for a continuous mono stream.
+
+    Equivalent to ``scipy.signal.resample_poly`` with its default Kaiser
+    filter, but fed block by block: the last few input samples are kept
+    between calls, so consecutive capture reads join without the edge
+    artifacts of resampling each chunk on its own. Each output sample
+    costs one dot product of ``taps_per_phase`` (about 20-60) multiplies,
+    instead of an FFT over the whole chunk. Output lags the input by
+    ``delay`` output samples (under a millisecond for 44.1/48 kHz).
+    """
+
+    def __init__(self, in_rate, out_rate=WHISPER_RATE, half_taps=10, beta=5.0):
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.up = int(out_rate) // g
+        self.down = int(in_rate) // g
+        max_rate = max(self.up, self.down)
+        n_taps = 2 * half_taps * max_rate + 1
+        t = np.arange(n_taps) - (n_taps - 1) / 2
+        h = np.sinc(t / max_rate) / max_rate * np.kaiser(n_taps, beta) * self.up
+        self.taps_per_phase = -(-n_taps // self.up)
+        h = np.concatenate([h, np.zeros(self.taps_per_phase * self.up - n_taps)])
+        # Row p holds the taps h[p + j*up] that meet input x[base - j], stored
+        # reversed so they line up with an ascending window of the input
+        self._phases = np.ascontiguousarray(h.reshape(self.taps_per_phase, self.up).T[:, ::-1], dtype=np.float32)
+        self._history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        self._in_count = 0  # input samples consumed so far
+        self._out_count = 0  # output samples produced so far
+        self.delay = 0.0 if self.up == self.down else (n_taps - 1) / 2 / self.down
+
+    @property
+    def passthrough(self):
+        return self.up == self.down
+
+    def process(self, samples):
+        """Resample the next block of float32 samples; returns the new output."""
+        if self.passthrough:
+            return samples
+        n = len(samples)
+        buf = np.concatenate((self._history, samples))
+        # Output k reads input up to index k*down // up, so it is ready once
+        # that sample has arrived
+        end = ((self._in_count + n) * self.up + self.down - 1) // self.down
+        k = np.arange(self._out_count, end, dtype=np.int64)
+        position = k * self.down
+        base = position // self.up - (self._in_count - len(self._history))
+        windows = sliding_window_view(buf, self.taps_per_phase)[base - (self.taps_per_phase - 1)]
+        out = np.einsum("ij,ij->i", windows, self._phases[position % self.up]).astype(np.float32, copy=False)
+
+        if len(self._history):
+            self._history = buf[-len(self._history):].copy()
+        self._in_count += n
+        self._out_count = end
+        return out
+
+
+# Backpressure policies for AudioRingBuffer
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+BLOCK = "block"
+BACKPRESSURE_POLICIES = (DROP_OLDEST, COALESCE, BLOCK)
+
+
+class AudioRingBuffer:
+    """Bounded single-producer/single-consumer float32 sample ring.
+
+    The capture thread writes int16 reads into it (converted in place) and
+    the inference worker pulls chunks out, so a slow decode never stops
+    ``stream.read`` from being called. What happens when the worker falls
+    behind far enough to fill the ring depends on ``policy``:
+
+    - ``drop_oldest``: overwrite the oldest unread audio and count it.
+    - ``coalesce``: like ``drop_oldest``, but ``read_chunk`` hands the
+      worker everything that has piled up as one chunk so a backlog is
+      caught up in fewer, longer decodes.
+    - ``block``: make the producer wait for space. Nothing is dropped here,
+      but the device may overflow instead while capture is stalled.
+    """
+
+    def __init__(self, capacity, policy=DROP_OLDEST):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.policy = policy
+        self._data = np.zeros(capacity, dtype=np.float32)
+        # Absolute sample counters; positions in the ring are taken modulo capacity
+        self._read = 0
+        self._write = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+        self.overflows = 0        # writes that had to discard unread audio
+        self.dropped_samples = 0  # unread samples discarded by those writes
+        self.producer_waits = 0   # writes that blocked for space (block policy)
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    @property
+    def available(self):
+        with self._lock:
+            return self._write - self._read
+
+    @property
+    def total_written(self):
+        return self._write
+
+    def close(self):
+        """Wake up any waiting reader/writer; reads drain what is left."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def write_pcm16(self, data, timeout=None):
+        """Convert int16 PCM bytes directly into the ring."""
+        return self._write_samples(np.frombuffer(data, dtype=np.int16), timeout)
+
+    def write(self, samples, timeout=None):
+        """Append float32 samples."""
+        return self._write_samples(np.asarray(samples, dtype=np.float32), timeout)
+
+    def _write_samples(self, samples, timeout):
+        capacity = len(self._data)
+        with self._lock:
+            if self._closed:
+                return False
+            n = len(samples)
+            if self.policy == BLOCK:
+                if self._write - self._read + min(n, capacity) > capacity:
+                    self.producer_waits += 1
+                    if not self._not_full.wait_for(
+                            lambda: self._closed or self._write - self._read + min(n, capacity) <= capacity,
+                            timeout):
+                        return False
+                    if self._closed:
+                        return False
+            if n > capacity:
+                # Only the newest `capacity` samples can survive anyway
+                self.dropped_samples += n - capacity
+                samples = samples[-capacity:]
+                n = capacity
+            overflow = self._write - self._read + n - capacity
+            if overflow > 0:
+                self._read += overflow
+                self.overflows += 1
+                self.dropped_samples += overflow
+
+            start = self._write % capacity
+            first = min(n, capacity - start)
+            self._store(samples[:first], self._data[start:start + first])
+            if first < n:
+                self._store(samples[first:], self._data[:n - first])
+            self._write += n
+            self._not_empty.notify()
+        return True
+
+    @staticmethod
+    def _store(src, dst):
+        if src.dtype == np.int16:
+            np.multiply(src, INT16_SCALE, out=dst, dtype=np.float32)
+        else:
+            dst[:] = src
+
+    def read(self, n, out, timeout=None):
+        """Copy exactly ``n`` samples into ``out`` and return that slice.
+
+        Returns ``None`` on timeout; after ``close()`` it returns whatever is
+        left (possibly fewer than ``n`` samples, or ``None`` once empty).
+        """
+        with self._lock:
+            if not self._not_empty.wait_for(lambda: self._closed or self._write - self._read >= n, timeout):
+                return None
+            return self._take(min(n, self._write - self._read), out)
+
+    def read_chunk(self, n, out, timeout=None):
+        """Read the next chunk for the inference worker, honouring the policy.
+
+        Under ``coalesce`` everything buffered (at least ``n`` samples, at
+        most ``len(out)``) is returned at once; otherwise exactly ``n``.
+        """
+        if self.policy != COALESCE:
+            return self.read(n, out, timeout)
+        with self._lock:
+            if not self._not_empty.wait_for(lambda: self._closed or self._write - self._read >= n, timeout):
+                return None
+            return self._take(min(len(out), self._write - self._read), out)
+
+    def _take(self, n, out):
+        # Caller holds the lock
+        if n <= 0:
+            return None
+        capacity = len(self._data)
+        start = self._read % capacity
+        first = min(n, capacity - start)
+        out[:first] = self._data[start:start + first]
+        if first < n:
+            out[first:n] = self._data[:n - first]
+        self._read += n
+        self._not_full.notify()
+        return out[:n]
+
+    def report_dropped(self, n):
+        """Account for samples lost before they reached the ring."""
+        with self._lock:
+            self.dropped_samples += n
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buffered_samples": self._write - self._read,
+                "overflows": self.overflows,
+                "dropped_samples": self.dropped_samples,
+                "producer_waits": self.producer_waits,
+            }
+
+
+class AudioCapture:
+    """Producer thread that keeps calling ``stream.read`` into a ring buffer.
+
+    It never waits on the model, so the PortAudio input buffer is drained
+    continuously. Device-level overflows are still counted (and the lost
+    read reported) rather than silently swallowed.
+
+    By default the device is opened in its native format (e.g. 48 kHz
+    stereo on many USB headsets); each read is downmixed and run through a
+    StreamingResampler so the ring always receives 16 kHz mono. Pass
+    ``rate``/``channels`` to force a format.
+    """
+
+    def __init__(self, ring, device_index=None, rate=None, channels=None, frames_per_buffer=1024,
+                 pa_factory=None, metrics=NULL_METRICS):
+        self.ring = ring
+        self.metrics = metrics
+        self.device_index = device_index
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.pa_factory = pa_factory
+        self.input_overflows = 0
+        self.error = None
+        # Format the stream was actually opened with, once it is open
+        self.stream_rate = None
+        self.stream_channels = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        # Close first: under the block policy the producer may be waiting for
+        # room in a full ring, and only close() wakes it
+        self.ring.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    @property
+    def running(self):
+        return self._running
+
+    def _native_format(self, p):
+        if self.device_index is None:
+            info = p.get_default_input_device_info()
+        else:
+            info = p.get_device_info_by_index(self.device_index)
+        # At most stereo: multi-input interfaces report 8+ channels, usually
+        # with one mic connected, and averaging them all buries its speech
+        return int(info["defaultSampleRate"]), max(1, min(MAX_CAPTURE_CHANNELS, int(info["maxInputChannels"])))
+
+    def _open(self, p):
+        rate, channels = self.rate, self.channels
+        if rate is None or channels is None:
+            native_rate, native_channels = self._native_format(p)
+            rate = rate or native_rate
+            channels = channels or native_channels
+        formats = [(rate, channels)]
+        if (self.rate, self.channels) == (None, None) and (rate, channels) != (WHISPER_RATE, 1):
+            # Some drivers report a default they then refuse; let PortAudio convert
+            formats.append((WHISPER_RATE, 1))
+        for i, (rate, channels) in enumerate(formats):
+            try:
+                stream = p.open(format=PA_INT16,
+                                channels=channels,
+                                rate=rate,
+                                input=True,
+                                input_device_index=self.device_index,
+                                frames_per_buffer=self.frames_per_buffer)
+            except Exception:
+                if i == len(formats) - 1:
+                    raise
+                continue
+            self.stream_rate, self.stream_channels = rate, channels
+            return stream
+
+    def _run(self):
+        if self.pa_factory is None:
+            import pyaudio
+            p = pyaudio.PyAudio()
+        else:
+            p = self.pa_factory()
+        stream = None
+        try:
+            stream = self._open(p)
+            rate, channels = self.stream_rate, self.stream_channels
+            native = rate == WHISPER_RATE and channels == 1
+            resampler = StreamingResampler(rate) if not native else None
+            # Device frames lost to an overflow, in ring samples
+            dropped_per_read = self.frames_per_buffer * WHISPER_RATE // rate
+            while self._running:
+                try:
+                    data = stream.read(self.frames_per_buffer, exception_on_overflow=True)
+                except IOError as e:
+                    if getattr(e, "errno", None) != PA_INPUT_OVERFLOWED:
+                        raise
+                    # PyAudio discards the read that reported the overflow
+                    self.input_overflows += 1
+                    self.ring.report_dropped(dropped_per_read)
+                    continue
+                if native:
+                    with self.metrics.stage("capture"):
+                        self.ring.write_pcm16(data)
+                    continue
+                with self.metrics.stage("resample"):
+                    samples = resampler.process(downmix(pcm16_to_float32(data), channels))
+                with self.metrics.stage("capture"):
+                    self.ring.write(samples)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._running = False
+            if stream is not None:
+                stream.stop_stream()
+                stream.close()
+            p.terminate()
+            self.ring.close()
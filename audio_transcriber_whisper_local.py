@@ -1,19 +1,47 @@
-import pyaudio
-import wave
+import itertools
 import threading
 import tkinter as tk
 from tkinter import scrolledtext, ttk, messagebox
 import queue
 import time
-import os
-import tempfile
-import whisper
-import torch
+
 import numpy as np
-import soundfile as sf
-from scipy import signal
+
+# torch, whisper and pyaudio are imported on background threads (see
+# preload_default_model and load_microphones) so the window appears at once
+
+from cascade import ConfidenceCascade
+from decoding_controller import DecodingController
+from audio_pipeline import AudioCapture, AudioRingBuffer, BACKPRESSURE_POLICIES, DROP_OLDEST
+from streaming import StreamingTranscriber
+from language_policy import LanguagePolicy
+from model_registry import ModelRegistry
+from session_archive import SessionArchive
+from pipeline_metrics import NULL_METRICS, ModelStageTimer, PipelineMetrics, temperature_fallbacks
+from transcription_engine import DEVICE_CHOICES, MODEL_SIZES, TranscriptionEngine
+from transcript_view import TranscriptView
+from vad import VADSegmenter
 
 class AudioTranscriberWhisperLocal:
+    # Seconds of audio the capture ring can hold before backpressure kicks in
+    RING_SECONDS = 30
+    # Block size fed to the VAD segmenter in voice-activity mode
+    VAD_BLOCK_SECONDS = 0.25
+    # How often live captions re-decode the uncommitted audio
+    STREAM_STEP_SECONDS = 0.5
+    # Memory the model cache may use before evicting least recently used models
+    MODEL_CACHE_BUDGET = 4 * 1024 ** 3
+    # Where "Pipeline metrics" writes per-chunk JSONL records and serves
+    # Prometheus text (http://127.0.0.1:<port>/metrics)
+    METRICS_LOG = "pipeline_metrics.jsonl"
+    METRICS_PORT = 9464
+    # Finished lines are logged per session under TRANSCRIPT_DIR; the text
+    # area only holds the newest MAX_VISIBLE_LINES (scroll up for older ones)
+    TRANSCRIPT_DIR = "transcripts"
+    MAX_VISIBLE_LINES = 1000
+    # "Archive session audio" writes FLAC + a segment index per session here
+    ARCHIVE_DIR = "archive"
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Auto Audio-to-Text Transcriber (Whisper Local - FREE)")
@@ -21,18 +49,44 @@ class AudioTranscriberWhisperLocal:
         
         self.is_listening = False
         self.text_queue = queue.Queue()
+        self._caption = None  # live caption line being built, None when closed
+        self._partial = ""
         self.selected_mic_index = None
+        self.engine = None
         self.model = None
+        # Larger model re-decoding weak lines while listening (cascade mode)
+        self.cascade = None
+        # Adapts decoding options to keep up with the audio (adaptive mode)
+        self.controller = None
+        # torch's CPU thread count at startup: the adaptive controller's
+        # budget (it changes the process-wide count while listening)
+        self.cpu_threads = None
+        # Every transcribed line gets a key: the cascade replaces lines by
+        # key and the session archive maps its segments to them
+        self._line_keys = itertools.count()
         self.model_size = "base"  # Start with base model
-        
-        # UI Setup
+        self.metrics = NULL_METRICS
+        self._metrics_shown_at = 0.0
+        # Background startup steps that have finished: "mics", "torch", "model"
+        self.ready = set()
+        # Loaded models stay cached (LRU within a memory budget), so switching
+        # back to a previous size/device is instant
+        self.registry = ModelRegistry(memory_budget=self.MODEL_CACHE_BUDGET,
+                                      log=lambda msg: self.text_queue.put(("text", msg)))
+        
+        # UI Setup; controls that need a slow dependency start disabled
+        # and are enabled from on_ready
         self.setup_ui()
         
-        # Load microphones
-        self.load_microphones()
-        
         # Start processing queue
         self.process_queue()
+        
+        # Enumerate microphones in the background
+        self.load_microphones()
+        
+        # Import torch/whisper, then load + warm up the default model,
+        # while the user looks around
+        self.preload_default_model()
     
     def setup_ui(self):
         # Title
@@ -48,7 +102,7 @@ class AudioTranscriberWhisperLocal:
         tk.Label(model_frame, text="Model Size:").grid(row=0, column=0, sticky=tk.W, pady=5)
         self.model_var = tk.StringVar(value="base")
         model_combo = ttk.Combobox(model_frame, textvariable=self.model_var,
-                                   values=["tiny", "base", "small", "medium", "large"],
+                                   values=MODEL_SIZES,
                                    state="readonly", width=15)
         model_combo.grid(row=0, column=1, padx=10, pady=5, sticky=tk.W)
         
@@ -61,20 +115,35 @@ class AudioTranscriberWhisperLocal:
         tk.Label(model_frame, text="Device:").grid(row=1, column=0, sticky=tk.W, pady=5)
         self.device_var = tk.StringVar(value="auto")
         device_combo = ttk.Combobox(model_frame, textvariable=self.device_var,
-                                    values=["auto", "cpu", "cuda"],
+                                    values=DEVICE_CHOICES,
                                     state="readonly", width=15)
         device_combo.grid(row=1, column=1, padx=10, pady=5, sticky=tk.W)
         
-        # Check if CUDA is available
-        cuda_available = torch.cuda.is_available()
-        cuda_status = "✓ GPU Available" if cuda_available else "✗ GPU Not Available"
-        cuda_color = "green" if cuda_available else "orange"
-        self.device_info = tk.Label(model_frame, text=f"{cuda_status} (auto = use GPU if available)", 
-                                   fg=cuda_color, font=("Arial", 8))
+        # GPU availability is filled in once torch has been imported
+        self.device_info = tk.Label(model_frame, text="Checking for GPU...",
+                                   fg="gray", font=("Arial", 8))
         self.device_info.grid(row=1, column=2, padx=10)
         
-        tk.Button(model_frame, text="Load Model", command=self.load_model,
-                 bg="#4CAF50", fg="white", font=("Arial", 10, "bold")).grid(row=0, column=3, rowspan=2, padx=10)
+        self.short_ctx_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(model_frame, text="Short encoder context (faster on CPU for short chunks, slightly less accurate)",
+                       variable=self.short_ctx_var).grid(row=2, column=0, columnspan=3, pady=5, sticky=tk.W)
+        
+        tk.Label(model_frame, text="Cascade:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.cascade_var = tk.StringVar(value="off")
+        ttk.Combobox(model_frame, textvariable=self.cascade_var,
+                     values=["off"] + MODEL_SIZES[1:],
+                     state="readonly", width=15).grid(row=3, column=1, padx=10, pady=5, sticky=tk.W)
+        tk.Label(model_frame, text="re-decode low-confidence lines with this larger model and replace them",
+                 fg="gray", font=("Arial", 8)).grid(row=3, column=2, padx=10, sticky=tk.W)
+        
+        self.adaptive_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(model_frame, text="Adaptive decoding (trade beam search/fallbacks for speed when falling behind; policy shown in status)",
+                       variable=self.adaptive_var).grid(row=4, column=0, columnspan=3, pady=5, sticky=tk.W)
+        
+        self.load_btn = tk.Button(model_frame, text="Load Model", command=self.load_model,
+                                  bg="#4CAF50", fg="white", font=("Arial", 10, "bold"),
+                                  state=tk.DISABLED)
+        self.load_btn.grid(row=0, column=3, rowspan=2, padx=10)
         
         # Microphone selection frame
         mic_frame = tk.LabelFrame(self.root, text="Microphone Settings", 
@@ -82,7 +151,9 @@ class AudioTranscriberWhisperLocal:
         mic_frame.pack(padx=20, pady=5, fill=tk.X)
         
         tk.Label(mic_frame, text="Select Microphone:").grid(row=0, column=0, sticky=tk.W, pady=5)
-        self.mic_combo = ttk.Combobox(mic_frame, width=50, state="readonly")
+        self.mic_combo = ttk.Combobox(mic_frame, width=50)
+        self.mic_combo.set("Looking for microphones...")
+        self.mic_combo.config(state=tk.DISABLED)
         self.mic_combo.grid(row=0, column=1, padx=10, pady=5, columnspan=2)
         
         tk.Label(mic_frame, text="Language:").grid(row=1, column=0, sticky=tk.W, pady=5)
@@ -104,6 +175,33 @@ class AudioTranscriberWhisperLocal:
                              font=("Arial", 8), fg="gray", justify=tk.LEFT)
         chunk_info.grid(row=2, column=2, padx=5, sticky=tk.W)
         
+        tk.Label(mic_frame, text="When Behind:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.backpressure_var = tk.StringVar(value=DROP_OLDEST)
+        backpressure_combo = ttk.Combobox(mic_frame, textvariable=self.backpressure_var,
+                                          values=list(BACKPRESSURE_POLICIES),
+                                          state="readonly", width=20)
+        backpressure_combo.grid(row=3, column=1, padx=10, pady=5, sticky=tk.W)
+        
+        tk.Label(mic_frame,
+                 text="drop_oldest = stay live, coalesce = catch up in longer chunks,\nblock = never drop buffered audio (device may overflow)",
+                 font=("Arial", 8), fg="gray", justify=tk.LEFT).grid(row=3, column=2, padx=5, sticky=tk.W)
+        
+        self.vad_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(mic_frame, text="Voice activity detection (cut at pauses, skip silence)",
+                       variable=self.vad_var).grid(row=4, column=1, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        
+        self.streaming_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(mic_frame, text="Live captions (partial results every 0.5s, higher CPU use)",
+                       variable=self.streaming_var).grid(row=5, column=1, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        
+        self.metrics_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(mic_frame, text=f"Pipeline metrics (per-stage timings, {self.METRICS_LOG}, port {self.METRICS_PORT})",
+                       variable=self.metrics_var).grid(row=6, column=1, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        
+        self.archive_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(mic_frame, text=f"Archive session audio (FLAC in {self.ARCHIVE_DIR}/, to re-transcribe later)",
+                       variable=self.archive_var).grid(row=7, column=1, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        
         # Control frame
         control_frame = tk.Frame(self.root)
         control_frame.pack(pady=10)
@@ -111,7 +209,8 @@ class AudioTranscriberWhisperLocal:
         self.start_btn = tk.Button(control_frame, text="Start Listening",
                                    command=self.start_listening,
                                    bg="#4CAF50", fg="white",
-                                   font=("Arial", 12), padx=20, pady=10)
+                                   font=("Arial", 12), padx=20, pady=10,
+                                   state=tk.DISABLED)
         self.start_btn.pack(side=tk.LEFT, padx=5)
         
         self.stop_btn = tk.Button(control_frame, text="Stop Listening",
@@ -128,10 +227,13 @@ class AudioTranscriberWhisperLocal:
         clear_btn.pack(side=tk.LEFT, padx=5)
         
         # Status
-        self.status_label = tk.Label(self.root, text="Status: Click 'Load Model' to start",
+        self.status_label = tk.Label(self.root, text="Status: Starting up...",
                                      font=("Arial", 10))
         self.status_label.pack(pady=5)
         
+        self.metrics_label = tk.Label(self.root, text="", font=("Consolas", 8), fg="gray")
+        self.metrics_label.pack()
+        
         # Text area
         text_frame = tk.Frame(self.root)
         text_frame.pack(padx=20, pady=10, fill=tk.BOTH, expand=True)
@@ -142,6 +244,9 @@ class AudioTranscriberWhisperLocal:
                                                    font=("Consolas", 11),
                                                    height=16)
         self.text_area.pack(fill=tk.BOTH, expand=True)
+        self.text_area.tag_config("partial", foreground="gray")
+        self.transcript = TranscriptView(self.text_area, store_dir=self.TRANSCRIPT_DIR,
+                                         max_lines=self.MAX_VISIBLE_LINES)
         
         # Info
         info_frame = tk.Frame(self.root)
@@ -163,65 +268,84 @@ class AudioTranscriberWhisperLocal:
         self.model_info.config(text=model_info.get(self.model_var.get(), ""))
     
     def load_microphones(self):
-        try:
-            p = pyaudio.PyAudio()
-            input_mics = []
-            
-            for i in range(p.get_device_count()):
-                info = p.get_device_info_by_index(i)
-                if info['maxInputChannels'] > 0:
-                    name = info['name']
-                    if any(keyword in name.lower() for keyword in ['microphone', 'input', 'capture', 'hyperx', 'trust', 'logitech']):
-                        if 'output' not in name.lower() and 'speaker' not in name.lower():
-                            input_mics.append((i, name))
-            
-            p.terminate()
+        """Enumerate input devices on a background thread (PortAudio can take seconds)"""
+        def enumerate_thread():
+            try:
+                import pyaudio
+                p = pyaudio.PyAudio()
+                input_mics = []
+                
+                for i in range(p.get_device_count()):
+                    info = p.get_device_info_by_index(i)
+                    if info['maxInputChannels'] > 0:
+                        name = info['name']
+                        if any(keyword in name.lower() for keyword in ['microphone', 'input', 'capture', 'hyperx', 'trust', 'logitech']):
+                            if 'output' not in name.lower() and 'speaker' not in name.lower():
+                                input_mics.append((i, name))
+                
+                p.terminate()
+            except Exception as e:
+                self.text_queue.put(("ready", ("mics", e)))
+                return
             
-            self.mic_combo['values'] = [f"[{i}] {name}" for i, name in input_mics]
             if input_mics:
+                self.text_queue.put(("text", f"Found {len(input_mics)} microphone(s)\n"))
+                self.text_queue.put(("text", f"Selected: {input_mics[0][1]}\n\n"))
+            self.text_queue.put(("ready", ("mics", input_mics)))
+        
+        threading.Thread(target=enumerate_thread, daemon=True).start()
+    
+    def on_ready(self, name, value):
+        """A background startup step finished; enable the controls that needed it"""
+        if name == "mics":
+            if isinstance(value, Exception):
+                self.mic_combo.set("")
+                messagebox.showerror("Error", f"Failed to load microphones: {value}")
+                value = []
+            self.mic_combo['values'] = [f"[{i}] {mic}" for i, mic in value]
+            self.mic_combo.config(state="readonly")
+            if value:
                 self.mic_combo.current(0)
-                self.selected_mic_index = input_mics[0][0]
-                self.text_area.insert(tk.END, f"Found {len(input_mics)} microphone(s)\n")
-                self.text_area.insert(tk.END, f"Selected: {input_mics[0][1]}\n\n")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load microphones: {e}")
+                self.selected_mic_index = value[0][0]
+            else:
+                self.mic_combo.set("")
+        elif name == "torch" and isinstance(value, Exception):
+            # Startup imports failed; leave Load Model usable to retry
+            # once the missing package is installed
+            self.status_label.config(text=f"Status: Whisper is not installed ({value})", fg="red")
+            self.load_btn.config(state=tk.NORMAL)
+            return
+        elif name == "torch":
+            cuda_status = "✓ GPU Available" if value else "✗ GPU Not Available"
+            self.device_info.config(text=f"{cuda_status} (auto = use GPU if available, cpu-int8 = quantized CPU)",
+                                    fg="green" if value else "orange")
+            self.load_btn.config(state=tk.NORMAL)
+        self.ready.add(name)
+        if {"mics", "model"} <= self.ready and not self.is_listening:
+            self.start_btn.config(state=tk.NORMAL)
     
     def load_model(self):
         """Load Whisper model"""
         model_size = self.model_var.get()
         device_choice = self.device_var.get()
         
-        self.text_area.insert(tk.END, f"[Loading Whisper {model_size} model...]\n")
-        self.text_area.insert(tk.END, "[First time will download the model]\n")
+        self.text_queue.put(("text", f"[Loading Whisper {model_size} model...]\n"))
+        self.text_queue.put(("text", "[First time will download the model]\n"))
         self.status_label.config(text="Status: Loading model...", fg="orange")
         
         def load_thread():
             try:
-                # Determine device
-                if device_choice == "auto":
-                    device = "cuda" if torch.cuda.is_available() else "cpu"
-                    self.text_queue.put(("text", f"[Auto-selected device: {device.upper()}]\n"))
-                else:
-                    device = device_choice
-                    self.text_queue.put(("text", f"[Using device: {device.upper()}]\n"))
-                
-                if device == "cpu":
-                    self.text_queue.put(("text", "[Running on CPU - will be slower]\n"))
-                else:
-                    if torch.cuda.is_available():
-                        gpu_name = torch.cuda.get_device_name(0)
-                        self.text_queue.put(("text", f"[GPU detected: {gpu_name}]\n"))
-                        self.text_queue.put(("text", "[Using GPU - will be fast!]\n"))
-                    else:
-                        self.text_queue.put(("text", "[WARNING: CUDA selected but not available, falling back to CPU]\n"))
-                        device = "cpu"
-                
-                self.text_queue.put(("text", "[Downloading/Loading model...]\n"))
-                self.model = whisper.load_model(model_size, device=device)
+                engine = TranscriptionEngine(model_size, device_choice, registry=self.registry,
+                                             log=lambda msg: self.text_queue.put(("text", msg)))
+                engine.load()
+                self.engine = engine
+                self.model = engine.model
                 
                 self.text_queue.put(("text", f"[✓ Model loaded successfully!]\n"))
+                self.report_model_cache()
                 self.text_queue.put(("text", "[Ready to transcribe]\n\n"))
                 self.text_queue.put(("status", "Ready - Click Start Listening"))
+                self.text_queue.put(("ready", ("model", None)))
                 
             except Exception as e:
                 self.text_queue.put(("error", f"Model load error: {e}"))
@@ -229,6 +353,48 @@ class AudioTranscriberWhisperLocal:
         
         threading.Thread(target=load_thread, daemon=True).start()
     
+    def preload_default_model(self):
+        """Load and warm up the default model in the background"""
+        model_size = self.model_var.get()
+        device_choice = self.device_var.get()
+        self.text_queue.put(("text", f"[Preloading {model_size} model in the background...]\n"))
+        
+        def preload_thread():
+            try:
+                # The slowest imports of the app; done here so the window
+                # is up (and usable) while they run
+                import torch
+                import whisper  # noqa: F401
+            except ImportError as e:
+                self.text_queue.put(("text", f"[ERROR] Whisper is not installed: {e}\n"))
+                self.text_queue.put(("ready", ("torch", e)))
+                return
+            self.cpu_threads = torch.get_num_threads()
+            self.text_queue.put(("ready", ("torch", torch.cuda.is_available())))
+            
+            try:
+                engine = TranscriptionEngine(model_size, device_choice, registry=self.registry)
+                engine.load()
+            except Exception as e:
+                self.text_queue.put(("text", f"[Preload failed: {e} - use Load Model]\n"))
+                return
+            # Don't override a model the user loaded in the meantime
+            if self.engine is None:
+                self.engine = engine
+                self.model = engine.model
+                self.text_queue.put(("text", f"[✓ {model_size} model preloaded and warmed up]\n"))
+                self.text_queue.put(("text", "[Ready to transcribe]\n\n"))
+                self.text_queue.put(("status", "Ready - Click Start Listening"))
+                self.text_queue.put(("ready", ("model", None)))
+        
+        threading.Thread(target=preload_thread, daemon=True).start()
+    
+    def report_model_cache(self):
+        stats = self.registry.stats()
+        total = sum(item["memory_bytes"] for item in stats) / 1024 ** 2
+        cached = ", ".join("/".join(item["key"][:2]) for item in stats)
+        self.text_queue.put(("text", f"[Cached models: {cached} (~{total:.0f} MB)]\n"))
+    
     def start_listening(self):
         if self.model is None:
             messagebox.showwarning("Warning", "Please load the model first")
@@ -258,136 +424,390 @@ class AudioTranscriberWhisperLocal:
         self.status_label.config(text="Status: Stopped", fg="red")
     
     def clear_text(self):
-        self.text_area.delete(1.0, tk.END)
+        self.transcript.clear()
+        self._caption = None
+        self._partial = ""
     
     def listen_continuously(self):
+        """Inference worker: pull chunks from the ring buffer and transcribe them.
+
+        Capture runs on its own producer thread (AudioCapture), so the
+        microphone keeps being read while Whisper is busy.
+        """
+        capture = None
+        model_timer = None
+        archive = None
         try:
-            p = pyaudio.PyAudio()
-            
-            CHUNK = 1024
-            FORMAT = pyaudio.paInt16
-            CHANNELS = 1
             RATE = 16000
             
-            stream = p.open(format=FORMAT,
-                          channels=CHANNELS,
-                          rate=RATE,
-                          input=True,
-                          input_device_index=self.selected_mic_index,
-                          frames_per_buffer=CHUNK)
+            if self.metrics_var.get():
+                self.metrics = self.start_metrics()
+                model_timer = ModelStageTimer(self.model, self.metrics)
+            metrics = self.metrics
+            
+            # Bounded buffer between the capture thread and this worker
+            ring = AudioRingBuffer(RATE * self.RING_SECONDS, policy=self.backpressure_var.get())
+            # Opened at the device's native rate/channels, resampled to 16 kHz mono
+            capture = AudioCapture(ring, device_index=self.selected_mic_index, metrics=metrics)
+            capture.start()
             
             self.text_queue.put(("text", "[Listening... Speak now!]\n\n"))
             
+            # Reused for every chunk; large enough for a full coalesced backlog
+            chunk_buffer = np.zeros(RATE * self.RING_SECONDS, dtype=np.float32)
+            reported_drops = 0
+            
+            segmenter = VADSegmenter(rate=RATE) if self.vad_var.get() else None
+            
+            # In auto mode, detect the language on the first confident chunks,
+            # then pin it for the session instead of detecting on every chunk
+            self.engine.language_policy = LanguagePolicy(
+                log=lambda msg: self.text_queue.put(("text", msg))) if self.language_var.get() == "auto" else None
+            
+            archive = self.start_archive()
+            if self.streaming_var.get():
+                skipped = [name for name, on in (("cascade", self.cascade_var.get() != "off"),
+                                                 ("adaptive decoding", self.adaptive_var.get())) if on]
+                if skipped:
+                    self.text_queue.put(("text", f"[Live captions: {' and '.join(skipped)} not used in this mode]\n"))
+                self.stream_captions(ring, capture, segmenter, chunk_buffer, archive)
+                return
+            
+            self.cascade = self.start_cascade()
+            if self.adaptive_var.get():
+                self.controller = DecodingController(max_backlog=max(6.0, 2 * self.chunk_var.get()),
+                                                     tune_threads=self.engine.device == "cpu",
+                                                     max_threads=self.cpu_threads,
+                                                     log=lambda msg: self.text_queue.put(("text", msg)))
+            controller = self.controller
+            
             while self.is_listening:
-                frames = []
                 chunk_duration = self.chunk_var.get()
+                policy_note = ""
+                if controller is not None:
+                    # Under heavy load the controller asks for longer chunks
+                    chunk_duration = min(controller.chunk_seconds(chunk_duration), self.RING_SECONDS / 2)
+                    policy_note = f" | {controller.describe()}"
                 
-                # Record for specified duration
-                self.text_queue.put(("status", "🎤 Recording..."))
-                
-                for _ in range(0, int(RATE / CHUNK * chunk_duration)):
-                    if not self.is_listening:
-                        break
-                    data = stream.read(CHUNK, exception_on_overflow=False)
-                    frames.append(data)
+                if segmenter is not None:
+                    # VAD mode: feed short blocks, transcribe only completed speech
+                    # segments (the slider is the maximum segment length)
+                    segmenter.set_max_segment(chunk_duration)
+                    self.text_queue.put(("status", ("🎤 Listening..." if not segmenter.in_speech else "🎤 Recording speech...") + policy_note))
+                    block = ring.read_chunk(int(RATE * self.VAD_BLOCK_SECONDS), chunk_buffer, timeout=0.2)
+                    if block is None:
+                        if capture.error is not None:
+                            raise capture.error
+                        continue
+                    if archive is not None:
+                        archive.write(block)
+                    with metrics.stage("vad"):
+                        # Segment offsets count the same samples as the archive
+                        segments = [(seg.audio, seg.start, seg.end) for seg in segmenter.push(block)]
+                else:
+                    self.text_queue.put(("status", "🎤 Recording..." + policy_note))
+                    audio_data = ring.read_chunk(int(RATE * chunk_duration), chunk_buffer, timeout=0.2)
+                    if audio_data is None:
+                        if capture.error is not None:
+                            raise capture.error
+                        continue
+                    start = archive.write(audio_data) if archive is not None else 0
+                    segments = [(audio_data, start, start + len(audio_data))]
                 
                 if not self.is_listening:
                     break
                 
-                # Save to temp file
-                self.text_queue.put(("status", "⚙️ Transcribing..."))
+                stats = ring.stats()
+                metrics.gauge("backlog_seconds", ring.available / RATE)
+                metrics.gauge("dropped_seconds", stats["dropped_samples"] / RATE)
+                metrics.gauge("device_overflows", capture.input_overflows)
+                if stats["dropped_samples"] > reported_drops:
+                    self.text_queue.put(("text", f"[Audio dropped: {stats['dropped_samples'] / RATE:.1f}s total, "
+                                                 f"{stats['overflows']} buffer overflow(s), "
+                                                 f"{capture.input_overflows} device overflow(s)]\n"))
+                    reported_drops = stats["dropped_samples"]
                 
-                # Create temp file and close it immediately to avoid locking issues on Windows
-                temp_fd, temp_path = tempfile.mkstemp(suffix=".wav")
-                os.close(temp_fd)  # Close the file descriptor immediately
-                
-                wf = wave.open(temp_path, 'wb')
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(p.get_sample_size(FORMAT))
-                wf.setframerate(RATE)
-                wf.writeframes(b''.join(frames))
-                wf.close()
-                
-                # Transcribe with Whisper
-                try:
-                    self.text_queue.put(("text", f"[DEBUG] Temp file created at: {temp_path}\n"))
-                    self.text_queue.put(("text", f"[DEBUG] File exists: {os.path.exists(temp_path)}\n"))
-                    self.text_queue.put(("text", f"[DEBUG] File size: {os.path.getsize(temp_path) if os.path.exists(temp_path) else 'N/A'} bytes\n"))
-                    
-                    # Load audio manually to avoid ffmpeg dependency
-                    import numpy as np
-                    import soundfile as sf
-                    
-                    # Read the WAV file directly
-                    audio_data, sample_rate = sf.read(temp_path)
-                    
-                    # Convert to mono if stereo
-                    if len(audio_data.shape) > 1:
-                        audio_data = audio_data.mean(axis=1)
-                    
-                    # Convert to float32 and normalize to [-1, 1]
-                    audio_data = audio_data.astype(np.float32)
-                    
-                    # Resample to 16kHz if needed (Whisper expects 16kHz)
-                    if sample_rate != 16000:
-                        from scipy import signal
-                        num_samples = int(len(audio_data) * 16000 / sample_rate)
-                        audio_data = signal.resample(audio_data, num_samples)
-                    
-                    language = self.language_var.get()
-                    if language == "auto":
-                        result = self.model.transcribe(audio_data, fp16=False)
-                    else:
-                        result = self.model.transcribe(audio_data, language=language, fp16=False)
-                    
-                    text = result["text"].strip()
-                    detected_lang = result.get("language", "unknown")
-                    
-                    if text:
-                        timestamp = time.strftime("%H:%M:%S")
-                        if language == "auto":
-                            self.text_queue.put(("text", f"[{timestamp}] [{detected_lang}] {text}\n"))
-                        else:
-                            self.text_queue.put(("text", f"[{timestamp}] {text}\n"))
-                    
-                except Exception as e:
-                    import traceback
-                    error_details = traceback.format_exc()
-                    self.text_queue.put(("text", f"[Transcription error: {e}]\n"))
-                    self.text_queue.put(("text", f"[ERROR DETAILS]\n{error_details}\n"))
-                
-                finally:
-                    # Clean up temp file
-                    try:
-                        os.unlink(temp_path)
-                    except:
-                        pass
+                for audio_data, start, end in segments:
+                    backlog = ring.available / RATE
+                    self.text_queue.put(("status", f"⚙️ Transcribing... (backlog {backlog:.1f}s){policy_note}"))
+                    key = self.transcribe_chunk(audio_data, backlog)
+                    if archive is not None:
+                        archive.add_segment(start, end, key if key is not None else -1)
+            
+            if segmenter is not None:
+                # Speech still open (or in its hangover) when Stop was pressed
+                last = segmenter.flush()
+                if last is not None:
+                    key = self.transcribe_chunk(last.audio)
+                    if archive is not None:
+                        archive.add_segment(last.start, last.end, key if key is not None else -1)
+            
+            if segmenter is not None and segmenter.frames_total:
+                skipped = segmenter.samples_skipped / RATE
+                total = segmenter.frames_total * segmenter.frame_len / RATE
+                self.text_queue.put(("text", f"[VAD skipped {skipped:.1f}s of {total:.1f}s as silence]\n"))
             
-            stream.stop_stream()
-            stream.close()
-            p.terminate()
+            policy = self.engine.language_policy
+            if policy is not None and policy.detections_skipped:
+                self.text_queue.put(("text", f"[Language detection skipped on {policy.detections_skipped} chunk(s), "
+                                             f"ran on {policy.detections_run}]\n"))
             
         except Exception as e:
             self.text_queue.put(("error", f"Error: {e}"))
+        
+        finally:
+            if capture is not None:
+                capture.stop()
+            if self.cascade is not None:
+                # Let the queued re-decodes finish so their lines are replaced
+                self.cascade.close()
+                summary = self.cascade.summary()
+                if summary:
+                    self.text_queue.put(("text", f"[Cascade: {summary}]\n"))
+                self.cascade = None
+            if self.controller is not None:
+                if self.controller.changes:
+                    self.text_queue.put(("text", f"[Decoding policy changed {self.controller.changes} time(s), "
+                                                 f"ended at {self.controller.describe()}]\n"))
+                self.controller.close()
+                self.controller = None
+            if archive is not None:
+                archive.close()
+                if archive.error is not None:
+                    self.text_queue.put(("text", f"[Audio archive incomplete: {archive.error}]\n"))
+                self.text_queue.put(("text", f"[Session audio archived in {archive.path}; re-transcribe with "
+                                             f"python session_archive.py reprocess {archive.path} --model medium]\n"))
+            if model_timer is not None:
+                model_timer.remove()
+            if self.metrics.enabled:
+                self.metrics.close()
+                self.metrics = NULL_METRICS
+    
+    def start_cascade(self):
+        """Larger-model worker for cascade mode, or None when it is off"""
+        size = self.cascade_var.get()
+        if size == "off":
+            return None
+        if MODEL_SIZES.index(size) <= MODEL_SIZES.index(self.engine.model_size):
+            self.text_queue.put(("text", f"[Cascade off: {size} is not larger than {self.engine.model_size}]\n"))
+            return None
+        log = lambda msg: self.text_queue.put(("text", msg))
+        engine = TranscriptionEngine(size, self.engine.device_choice, registry=self.registry, log=log)
+        self.text_queue.put(("text", f"[Cascade: weak lines are re-decoded with {size}]\n"))
+        return ConfidenceCascade(engine, log=log).start()
+    
+    def start_archive(self):
+        """FLAC archive of this session's audio, or None when it is off"""
+        if not self.archive_var.get():
+            return None
+        try:
+            return SessionArchive(self.ARCHIVE_DIR, transcript=self.transcript.path)
+        except (ImportError, OSError) as e:
+            self.text_queue.put(("text", f"[Audio archive unavailable: {e}]\n"))
+            return None
+    
+    def start_metrics(self):
+        metrics = PipelineMetrics(jsonl_path=self.METRICS_LOG)
+        try:
+            port = metrics.serve(self.METRICS_PORT)
+            self.text_queue.put(("text", f"[Metrics: {self.METRICS_LOG}, http://127.0.0.1:{port}/metrics]\n"))
+        except OSError as e:
+            self.text_queue.put(("text", f"[Metrics endpoint unavailable ({e}); logging to {self.METRICS_LOG} only]\n"))
+        return metrics
+    
+    def stream_captions(self, ring, capture, segmenter, chunk_buffer, archive=None):
+        """Live-caption loop: committed text plus a replaceable partial tail.
+
+        With VAD enabled, decoding pauses during silence and the caption
+        line is finalized when an utterance ends. With an archive, every
+        block is archived and each caption line indexed as one segment.
+        """
+        RATE = 16000
+        language = self.language_var.get()
+        streamer = StreamingTranscriber(self.model,
+                                        language=None if language == "auto" else language,
+                                        step_seconds=self.STREAM_STEP_SECONDS,
+                                        transcribe_options={"fp16": False})
+        was_in_speech = False
+        # Session sample range of the caption line being built, and whether
+        # it has any text yet
+        line_start, line_end, line_text = 0, 0, False
+        
+        def end_line(text):
+            nonlocal line_text
+            line_text = line_text or bool(text)
+            key = next(self._line_keys) if line_text else None
+            self.text_queue.put(("commit", text))
+            self.text_queue.put(("line_end", key))
+            # Stopping in silence closes no utterance
+            if archive is not None and (segmenter is None or was_in_speech):
+                archive.add_segment(line_start, line_end, key if key is not None else -1)
+            line_text = False
+        
+        while self.is_listening:
+            block = ring.read_chunk(int(RATE * self.STREAM_STEP_SECONDS / 5), chunk_buffer, timeout=0.2)
+            if block is None:
+                if capture.error is not None:
+                    raise capture.error
+                continue
+            if archive is not None:
+                archive.write(block)
+            streamer.insert_audio(block)
+            line_end += len(block)
+            
+            if segmenter is not None:
+                # Segment offsets count the same samples as the archive
+                for segment in segmenter.push(block):
+                    line_end = segment.end
+                in_speech = segmenter.in_speech
+                if in_speech and not was_in_speech:
+                    line_start = segmenter.open_segment().start
+                if was_in_speech and not in_speech:
+                    # Utterance over: commit everything and start a new line
+                    end_line(streamer.finish())
+                was_in_speech = in_speech
+                if not in_speech:
+                    streamer.drop_audio(keep_seconds=0.5)
+                    self.text_queue.put(("status", "🎤 Listening..."))
+                    continue
+            
+            if streamer.ready():
+                self.text_queue.put(("status", f"⚙️ Live captions... (backlog {ring.available / RATE:.1f}s)"))
+                with self.metrics.stage("transcribe"):
+                    committed, partial = streamer.process()
+                if committed:
+                    line_text = True
+                    self.text_queue.put(("commit", committed))
+                self.text_queue.put(("partial", partial))
+        
+        end_line(streamer.finish())
+    
+    def transcribe_chunk(self, audio_data, backlog_seconds=0.0):
+        """Run Whisper on one chunk/segment and queue the resulting line.
+        
+        Returns the line's key, or None when nothing was transcribed.
+        """
+        try:
+            language = self.language_var.get()
+            metrics = self.metrics
+            controller = self.controller
+            options = controller.decode_options() if controller is not None else {}
+            model_before = metrics.stage_wall("encoder") + metrics.stage_wall("decoder")
+            start = time.perf_counter()
+            with metrics.stage("transcribe"):
+                # Short context: encoder only runs over the frames covering this chunk
+                result = self.engine.transcribe(audio_data, language=language,
+                                                short_context=self.short_ctx_var.get(), **options)
+            elapsed = time.perf_counter() - start
+            if controller is not None:
+                controller.observe(len(audio_data) / 16000, elapsed, backlog_seconds)
+                metrics.gauge("decoding_step", controller.step)
+            if metrics.enabled:
+                # Log-mel, language detection and decoding bookkeeping
+                model_time = metrics.stage_wall("encoder") + metrics.stage_wall("decoder") - model_before
+                metrics.record("mel_other", max(elapsed - model_time, 0.0))
+                chunk_seconds = len(audio_data) / 16000
+                metrics.gauge("rtf", elapsed / chunk_seconds)
+                metrics.count("temperature_fallbacks", temperature_fallbacks(result))
+                metrics.record_chunk(chunk_seconds=chunk_seconds, transcribe_seconds=elapsed)
+            
+            text = result["text"].strip()
+            detected_lang = result.get("language", "unknown")
+            
+            timestamp = time.strftime("%H:%M:%S")
+            prefix = f"[{timestamp}] [{detected_lang}]" if language == "auto" else f"[{timestamp}]"
+            cascade = self.cascade
+            key = next(self._line_keys) if text else None
+            if text:
+                self.text_queue.put(("line", (key, f"{prefix} {text}\n")))
+            if cascade is not None:
+                cascade.observe(audio_data, result, elapsed, lambda better: self.text_queue.put(
+                    ("replace", (key, f"{prefix} {better['text'].strip()}\n"))))
+            return key
+            
+        except Exception as e:
+            import traceback
+            error_details = traceback.format_exc()
+            self.text_queue.put(("text", f"[Transcription error: {e}]\n"))
+            self.text_queue.put(("text", f"[ERROR DETAILS]\n{error_details}\n"))
     
     def process_queue(self):
+        metrics = self.metrics
+        metrics.gauge("queue_depth", self.text_queue.qsize())
+        with metrics.stage("ui_queue"):
+            self.drain_queue()
+        
+        now = time.perf_counter()
+        if metrics.enabled and now - self._metrics_shown_at >= 1.0:
+            self.metrics_label.config(text=metrics.readout())
+            self._metrics_shown_at = now
+        
+        self.root.after(100, self.process_queue)
+    
+    def drain_queue(self):
+        """Apply every pending worker message with one text area update.
+
+        "line" is a transcribed line (or (key, line), so the cascade can
+        "replace" it later), "text" a note; both are finished
+        lines. "commit"/"partial"/"line_end" build the live caption line.
+        """
+        lines = []
+        replacements = []
+        caption_changed = False
+        status = None
         try:
             while True:
                 msg_type, msg = self.text_queue.get_nowait()
                 
-                if msg_type == "text":
-                    self.text_area.insert(tk.END, msg)
-                    self.text_area.see(tk.END)
+                if msg_type in ("text", "line"):
+                    if self._caption is not None:
+                        # A note ends the caption line it interrupts
+                        lines.append(("caption", self._caption))
+                        self._caption, self._partial = None, ""
+                        caption_changed = True
+                    if msg_type == "line" and isinstance(msg, tuple):
+                        key, msg = msg
+                        lines.append(("line", msg, key))
+                    else:
+                        lines.append(("note" if msg_type == "text" else "line", msg))
+                elif msg_type == "replace":
+                    # A cascade re-decode of an earlier line
+                    replacements.append(msg)
+                elif msg_type == "partial":
+                    # Replaceable tail of the live caption line
+                    self._partial = msg
+                    if msg and self._caption is None:
+                        self._caption = f"[{time.strftime('%H:%M:%S')}]"
+                    caption_changed = True
+                elif msg_type == "commit":
+                    self._partial = ""
+                    if msg:
+                        self._caption = (self._caption or f"[{time.strftime('%H:%M:%S')}]") + " " + msg
+                    caption_changed = True
+                elif msg_type == "line_end":
+                    # msg is the line's key (for the session archive), or None
+                    if self._caption is not None:
+                        lines.append(("caption", self._caption) + ((msg,) if msg is not None else ()))
+                        self._caption, self._partial = None, ""
+                        caption_changed = True
+                elif msg_type == "ready":
+                    self.on_ready(*msg)
                 elif msg_type == "status":
                     if self.is_listening or "Loading" in msg or "Ready" in msg:
-                        self.status_label.config(text=f"Status: {msg}", fg="green")
+                        status = msg
                 elif msg_type == "error":
+                    status = None  # the error stays visible
                     self.status_label.config(text=msg, fg="red")
                     self.stop_listening()
         except queue.Empty:
             pass
         
-        self.root.after(100, self.process_queue)
+        if lines or caption_changed:
+            self.transcript.update(lines, self._caption, self._partial, caption_changed)
+        for key, text in replacements:
+            self.transcript.replace(key, text)
+        if status is not None:
+            self.status_label.config(text=f"Status: {status}", fg="green")
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,149 @@
+"""Shared inference scheduler that decodes pending segments as one batch.
+
+Several producers (microphones, files, network clients) submit speech
+segments; a single worker thread gathers whatever is pending (up to
+``max_batch``, waiting at most ``max_wait`` after the first arrival),
+stacks the log-mel windows into one ``(B, n_mels, 3000)`` tensor and runs
+them through Whisper's batched ``decode``. One model serves every source,
+and the encoder/decoder run on full batches instead of N separate calls.
+Each ``submit`` returns a ``concurrent.futures.Future`` resolving to a
+transcribe()-shaped dict.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES, log_mel_spectrogram, pad_or_trim
+
+from decoding import decoding_options, decoding_to_transcript, needs_fallback
+
+DEFAULT_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+class _Request:
+    __slots__ = ("audio", "language", "future", "submitted")
+
+    def __init__(self, audio, language):
+        self.audio = audio
+        self.language = language
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class BatchScheduler:
+    """Batches decode requests from many sources onto one model."""
+
+    def __init__(self, model, max_batch=8, max_wait=0.1, fp16=False, temperature=DEFAULT_TEMPERATURES,
+                 max_pending=256):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.fp16 = fp16
+        self.temperature = temperature
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._running = False
+        self._thread = None
+
+        self.batches = 0
+        self.segments = 0
+        self.fallback_decodes = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def submit(self, audio, language=None, block=True, timeout=None):
+        """Queue a float32 16 kHz segment (<= 30 s). Raises queue.Full when
+        the scheduler is saturated and ``block`` is False."""
+        if len(audio) > N_SAMPLES:
+            raise ValueError("Segments must be at most 30 s long")
+        request = _Request(np.asarray(audio, dtype=np.float32), language)
+        self._queue.put(request, block=block, timeout=timeout)
+        return request.future
+
+    def transcribe_batch(self, audios, language=None):
+        """Synchronously decode a list of segments as one batch (no queue)."""
+        requests = [_Request(np.asarray(a, dtype=np.float32), language) for a in audios]
+        self._decode(requests)
+        return [r.future.result() for r in requests]
+
+    def _run(self):
+        while self._running:
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._decode(batch)
+
+    def _decode(self, batch):
+        start = time.perf_counter()
+        try:
+            # Requests with different pinned languages can't share a decode
+            by_language = {}
+            for request in batch:
+                by_language.setdefault(request.language, []).append(request)
+            for language, requests in by_language.items():
+                self._decode_group(requests, language)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+            self.batches += 1
+            self.segments += len(batch)
+
+    def _decode_group(self, requests, language):
+        mel = torch.stack([
+            log_mel_spectrogram(pad_or_trim(r.audio), self.model.dims.n_mels) for r in requests
+        ]).to(self.model.device)
+
+        todo = list(range(len(requests)))
+        results = [None] * len(requests)
+        for t in self.temperature:
+            options = decoding_options(t, language=language, fp16=self.fp16)
+            if t == 0:
+                decoded = whisper.decode(self.model, mel[todo], options)
+            else:
+                # best_of sampling doesn't batch across audio in whisper's
+                # decode, and fallbacks are the minority anyway
+                decoded = [whisper.decode(self.model, mel[i], options) for i in todo]
+            retry = []
+            for index, result in zip(todo, decoded):
+                results[index] = result
+                if needs_fallback(result):
+                    retry.append(index)
+            if not retry:
+                break
+            # Only the segments that failed go round again at a higher temperature
+            self.fallback_decodes += len(retry)
+            todo = retry
+
+        for request, result in zip(requests, results):
+            request.future.set_result(decoding_to_transcript(result, len(request.audio)))
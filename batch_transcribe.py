@@ -0,0 +1,135 @@
+"""Headless batch transcription of an audio archive.
+
+Walks a directory of recordings and fans the files out over a pool of
+worker processes. Each worker loads the model once and reuses it for every
+file it is given. Outputs are written next to each other under the output
+directory (mirroring the input tree); files whose outputs already exist are
+skipped, so an interrupted run can simply be started again.
+
+    python batch_transcribe.py recordings/ -o transcripts/ --model small --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from transcript_formats import WRITERS
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".m4a", ".opus", ".aac", ".wma", ".webm", ".mp4")
+
+# Set once per worker process by _init_worker
+_engine = None
+_options = None
+
+
+def find_audio_files(root, extensions=AUDIO_EXTENSIONS):
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.lower().endswith(extensions):
+                yield os.path.join(dirpath, name)
+
+
+def output_paths(audio_path, input_root, output_root, formats):
+    relative = os.path.splitext(os.path.relpath(audio_path, input_root))[0]
+    return {fmt: os.path.join(output_root, f"{relative}.{fmt}") for fmt in formats}
+
+
+def is_done(paths):
+    return all(os.path.exists(p) for p in paths.values())
+
+
+def _init_worker(model_size, device, threads, options):
+    global _engine, _options
+    import torch
+    from transcription_engine import TranscriptionEngine
+
+    if threads:
+        torch.set_num_threads(threads)
+    _engine = TranscriptionEngine(model_size, device)
+    _engine.load()
+    _options = options
+
+
+def _transcribe_one(audio_path, paths):
+    start = time.perf_counter()
+    try:
+        result, duration = _engine.transcribe_file(audio_path, **_options)
+        for fmt, out_path in paths.items():
+            os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+            # Write to a temp name first so a killed run never leaves an
+            # output that looks complete
+            tmp_path = out_path + ".part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                WRITERS[fmt](result, f, source=audio_path)
+            os.replace(tmp_path, out_path)
+        return {"path": audio_path, "duration": duration, "elapsed": time.perf_counter() - start, "error": None}
+    except Exception as e:
+        return {"path": audio_path, "duration": 0.0, "elapsed": time.perf_counter() - start, "error": repr(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-transcribe a directory of audio files with Whisper.")
+    parser.add_argument("input_dir")
+    parser.add_argument("-o", "--output-dir", help="where to write transcripts (default: the input directory)")
+    parser.add_argument("--model", default="base", help="tiny/base/small/medium/large")
+    parser.add_argument("--device", default="cpu", help="auto/cpu/cuda/cpu-int8")
+    parser.add_argument("--language", default="auto")
+    parser.add_argument("--formats", nargs="+", default=["jsonl", "srt", "vtt"], choices=sorted(WRITERS))
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 4),
+                        help="worker processes, each with its own model copy")
+    parser.add_argument("--threads-per-worker", type=int, default=0,
+                        help="torch intra-op threads per worker (default: cores / workers)")
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or args.input_dir
+    files = list(find_audio_files(args.input_dir))
+    pending = []
+    for path in files:
+        paths = output_paths(path, args.input_dir, output_dir, args.formats)
+        if not is_done(paths):
+            pending.append((path, paths))
+    print(f"{len(files)} audio file(s), {len(files) - len(pending)} already done, {len(pending)} to transcribe")
+    if not pending:
+        return 0
+
+    workers = max(1, min(args.workers, len(pending)))
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    options = {"language": args.language}
+
+    total_audio = 0.0
+    total_compute = 0.0
+    failures = 0
+    start = time.perf_counter()
+    # spawn: each worker starts clean instead of forking a process with torch threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(args.model, args.device, threads, options)) as pool:
+        futures = [pool.submit(_transcribe_one, path, paths) for path, paths in pending]
+        for i, future in enumerate(as_completed(futures), 1):
+            item = future.result()
+            if item["error"]:
+                failures += 1
+                print(f"[{i}/{len(pending)}] FAILED {item['path']}: {item['error']}", file=sys.stderr)
+                continue
+            total_audio += item["duration"]
+            total_compute += item["elapsed"]
+            rtf = item["elapsed"] / item["duration"] if item["duration"] else 0.0
+            print(f"[{i}/{len(pending)}] {item['path']} ({item['duration']:.1f}s audio, RTF {rtf:.2f})")
+
+    wall = time.perf_counter() - start
+    done = len(pending) - failures
+    print(f"\nTranscribed {done} file(s), {total_audio / 3600:.2f} h of audio in {wall:.1f}s "
+          f"with {workers} worker(s) x {threads} thread(s)")
+    if total_audio:
+        print(f"Aggregate real-time factor: {wall / total_audio:.3f} (wall) / "
+              f"{total_compute / total_audio:.3f} (per worker)")
+    print(f"Throughput: {done / wall * 3600:.1f} files/hour, {total_audio / wall:.1f}x real time")
+    if failures:
+        print(f"{failures} file(s) failed", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Shared helpers for the benchmark scripts (finding fixtures, scoring)."""
+import glob
+import os
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(REPO_ROOT, "benchmarks", "fixtures")
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def find_fixtures(paths=None):
+    """Resolve fixture WAVs: explicit paths/directories, else benchmarks/fixtures/."""
+    paths = paths or [FIXTURES_DIR]
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, "*.wav")) + glob.glob(os.path.join(path, "*.flac"))))
+        else:
+            found.append(path)
+    return found
+
+
+def reference_text(audio_path):
+    """Reference transcript stored next to a fixture as <name>.txt, if any."""
+    txt = os.path.splitext(audio_path)[0] + ".txt"
+    if os.path.exists(txt):
+        with open(txt, encoding="utf-8") as f:
+            return f.read().strip()
+    return None
+
+
+def _normalize_words(text):
+    import re
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Levenshtein word error rate after lower-casing and stripping punctuation."""
+    ref = _normalize_words(reference)
+    hyp = _normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    return float(np.percentile(values, pct))
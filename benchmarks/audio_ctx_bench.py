@@ -0,0 +1,83 @@
+"""Accuracy/throughput of reduced encoder contexts for the UI's chunk sizes.
+
+Every fixture is cut into chunks of each length, each chunk is decoded with
+the full 30 s context (the baseline) and with a range of reduced contexts.
+Accuracy is reported as WER against the full-context output, and against
+the fixture's reference transcript when a <name>.txt is present.
+
+    python benchmarks/audio_ctx_bench.py --model base --chunks 3 5 10 --language en
+"""
+import argparse
+import time
+
+import _common
+from short_context import audio_ctx_for, transcribe_short
+from transcription_engine import load_audio_file
+
+RATE = 16000
+
+
+def run(model, chunks, language, audio_ctx):
+    texts = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        if audio_ctx is None:
+            result = model.transcribe(chunk, language=language, fp16=False, without_timestamps=True,
+                                      condition_on_previous_text=False)
+        else:
+            result = transcribe_short(model, chunk, language=language, audio_ctx=audio_ctx)
+        texts.append(result["text"].strip())
+    return (time.perf_counter() - start) / max(len(chunks), 1), texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="WAV/FLAC files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--language", default="en",
+                        help="fixed language keeps detection out of the comparison")
+    parser.add_argument("--chunks", type=float, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--margins", type=int, nargs="+", default=[0, 64, 128, 256],
+                        help="extra encoder frames on top of the minimum needed for the chunk")
+    args = parser.parse_args()
+
+    import whisper
+    model = whisper.load_model(args.model, device=args.device)
+
+    fixtures = _common.find_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error("no fixtures found")
+    audios = [(load_audio_file(p), _common.reference_text(p)) for p in fixtures]
+
+    print(f"{'chunk':>6} {'audio_ctx':>9} {'s/chunk':>8} {'speedup':>8} {'WER vs full':>12} {'WER vs ref':>11}")
+    for seconds in args.chunks:
+        n = int(RATE * seconds)
+        chunks, references = [], []
+        for audio, reference in audios:
+            first = len(chunks)
+            chunks.extend(audio[i:i + n] for i in range(0, len(audio) - n + 1, n))
+            if reference:
+                references.append((first, len(chunks), reference))
+
+        base_time, base_texts = run(model, chunks, args.language, None)
+        print(f"{seconds:>5g}s {'1500':>9} {base_time:>8.3f} {'1.0x':>8} {'-':>12} {_ref_wer(references, base_texts):>11}")
+
+        for ctx in sorted({audio_ctx_for(n, min_audio_ctx=0, margin=m) for m in args.margins}):
+            t, texts = run(model, chunks, args.language, ctx)
+            agreement = _common.word_error_rate(" ".join(base_texts), " ".join(texts))
+            print(f"{seconds:>5g}s {ctx:>9d} {t:>8.3f} {base_time / t:>7.1f}x {agreement:>12.3f} "
+                  f"{_ref_wer(references, texts):>11}")
+
+
+def _ref_wer(references, texts):
+    # Chunks only cover whole fixtures in order, so join each fixture's texts
+    if not references:
+        return "-"
+    errors = [_common.word_error_rate(reference, " ".join(texts[start:end]))
+              for start, end, reference in references]
+    return f"{sum(errors) / len(errors):.3f}"
+
+
+if __name__ == "__main__":
+    main()
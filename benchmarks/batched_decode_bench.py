@@ -0,0 +1,70 @@
+"""Throughput of batched decoding versus N independent transcribe() calls.
+
+Cuts fixtures into speech segments (as the multi-source runner would) and
+decodes the same segments once with one ``model.transcribe`` per segment
+and once through BatchScheduler at several batch sizes.
+
+    python benchmarks/batched_decode_bench.py --model base --batch-sizes 1 2 4 8 --language en
+"""
+import argparse
+import time
+
+import torch
+
+import _common
+from batch_scheduler import BatchScheduler
+from transcription_engine import load_audio_file
+from vad import segment_audio
+
+RATE = 16000
+
+
+def collect_segments(paths, limit):
+    segments = []
+    for path in paths:
+        segments.extend(s.audio for s in segment_audio(load_audio_file(path), RATE, 15))
+        if len(segments) >= limit:
+            break
+    return segments[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="WAV/FLAC files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--segments", type=int, default=32)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    import whisper
+    model = whisper.load_model(args.model, device=args.device)
+    segments = collect_segments(_common.find_fixtures(args.fixtures), args.segments)
+    if not segments:
+        parser.error("no speech segments found in the fixtures")
+    audio_seconds = sum(len(s) for s in segments) / RATE
+    threads = torch.get_num_threads() if args.device == "cpu" else 1
+    print(f"{len(segments)} segments, {audio_seconds:.1f}s of speech, {threads} torch thread(s)\n")
+
+    start = time.perf_counter()
+    for segment in segments:
+        model.transcribe(segment, language=args.language, fp16=False,
+                         condition_on_previous_text=False, without_timestamps=True)
+    baseline = time.perf_counter() - start
+    print(f"{'independent':>12}: {baseline:7.2f}s  {len(segments) / baseline:6.2f} seg/s  "
+          f"{len(segments) / baseline / threads:6.3f} seg/s/core  RTF {baseline / audio_seconds:.3f}")
+
+    scheduler = BatchScheduler(model)
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(segments), batch_size):
+            scheduler.transcribe_batch(segments[i:i + batch_size], language=args.language)
+        elapsed = time.perf_counter() - start
+        print(f"{'batch ' + str(batch_size):>12}: {elapsed:7.2f}s  {len(segments) / elapsed:6.2f} seg/s  "
+              f"{len(segments) / elapsed / threads:6.3f} seg/s/core  RTF {elapsed / audio_seconds:.3f}  "
+              f"({baseline / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Confidence cascade (fast model, weak segments re-decoded by a larger one).
+
+Cuts every fixture into speech segments with the VAD, as the app does,
+then decodes every segment with both the fast and the large model once.
+For each ``--logprob`` threshold it replays the cascade decision offline:
+the fraction of segments escalated, the compute used (fast on everything
+plus large on the escalated segments) against the large model on
+everything, and WER of fast-only, cascade and large-only output. WER is
+against the fixture's <name>.txt when present, else against the large
+model's output.
+
+    python benchmarks/cascade_bench.py --fast tiny --large small --logprob -0.6 -0.8 -1.0
+"""
+import argparse
+import time
+
+import _common
+from cascade import weak_reason
+from model_registry import ModelRegistry
+from transcription_engine import TranscriptionEngine, load_audio_file
+from vad import segment_audio
+
+RATE = 16000
+
+
+def load_engine(size, device, registry):
+    engine = TranscriptionEngine(size, device, registry=registry)
+    engine.load()
+    return engine
+
+
+def decode_all(engine, segments, language):
+    results, seconds = [], []
+    engine.transcribe(segments[0][:RATE], language=language)  # warm-up
+    for audio in segments:
+        start = time.perf_counter()
+        results.append(engine.transcribe(audio, language=language))
+        seconds.append(time.perf_counter() - start)
+    return results, seconds
+
+
+def score(references, texts_by_fixture):
+    scored = [(ref, " ".join(texts)) for ref, texts in zip(references, texts_by_fixture) if ref]
+    return sum(_common.word_error_rate(r, h) for r, h in scored) / len(scored) if scored else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="WAV/FLAC files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--fast", default="tiny")
+    parser.add_argument("--large", default="small")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--max-segment", type=float, default=10, help="seconds, like the Chunk Duration slider")
+    parser.add_argument("--logprob", type=float, nargs="+", default=[-0.6, -0.8, -1.0],
+                        help="avg_logprob thresholds to try")
+    parser.add_argument("--compression-ratio", type=float, default=2.2)
+    parser.add_argument("--no-speech", type=float, default=0.5)
+    args = parser.parse_args()
+
+    fixtures = _common.find_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error("no fixtures found")
+    per_fixture = [[s.audio for s in segment_audio(load_audio_file(p), RATE, args.max_segment)]
+                   for p in fixtures]
+    segments = [s for fixture in per_fixture for s in fixture]
+    owner = [i for i, fixture in enumerate(per_fixture) for _ in fixture]
+    audio_seconds = sum(len(s) for s in segments) / RATE
+    print(f"{len(fixtures)} fixture(s), {len(segments)} speech segment(s), {audio_seconds:.1f}s of speech\n")
+
+    registry = ModelRegistry()
+    fast, fast_seconds = decode_all(load_engine(args.fast, args.device, registry), segments, args.language)
+    large, large_seconds = decode_all(load_engine(args.large, args.device, registry), segments, args.language)
+
+    def by_fixture(texts):
+        grouped = [[] for _ in fixtures]
+        for i, text in zip(owner, texts):
+            grouped[i].append(text)
+        return grouped
+
+    fast_texts = [r["text"].strip() for r in fast]
+    large_texts = [r["text"].strip() for r in large]
+    references = [_common.reference_text(p) for p in fixtures]
+    if not any(references):
+        references = [" ".join(texts) for texts in by_fixture(large_texts)]
+        print("No reference transcripts: WER is against the large model's output\n")
+
+    total_fast, total_large = sum(fast_seconds), sum(large_seconds)
+    print(f"{'config':>18} {'escalated':>9} {'compute s':>9} {'vs large':>8} {'WER':>6}")
+    print(f"{args.fast + ' only':>18} {'-':>9} {total_fast:9.1f} {total_fast / total_large:8.0%} "
+          f"{score(references, by_fixture(fast_texts)):6.3f}")
+    for threshold in args.logprob:
+        weak = [bool(text) and weak_reason(r, logprob_threshold=threshold,
+                                           compression_ratio_threshold=args.compression_ratio,
+                                           no_speech_threshold=args.no_speech) is not None
+                for r, text in zip(fast, fast_texts)]
+        texts = [l if w else f for f, l, w in zip(fast_texts, large_texts, weak)]
+        used = total_fast + sum(s for s, w in zip(large_seconds, weak) if w)
+        label = f"cascade {threshold:g}"
+        print(f"{label:>18} {sum(weak) / len(weak):9.0%} {used:9.1f} {used / total_large:8.0%} "
+              f"{score(references, by_fixture(texts)):6.3f}")
+    print(f"{args.large + ' only':>18} {'-':>9} {total_large:9.1f} {1:8.0%} "
+          f"{score(references, by_fixture(large_texts)):6.3f}")
+
+
+if __name__ == "__main__":
+    main()
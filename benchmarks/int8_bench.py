@@ -0,0 +1,88 @@
+"""fp32 versus int8 dynamic-quantized Whisper on CPU.
+
+For each model size, loads the fp32 model and the int8 model (quantizing on
+the first run, then from the on-disk cache), transcribes every fixture with
+both, and reports load time, latency, real-time factor, weight memory, RSS
+growth and WER. WER is against the fixture's <name>.txt when present, else
+the int8 output is scored against the fp32 output.
+
+    python benchmarks/int8_bench.py --models tiny base small --language en
+"""
+import argparse
+import gc
+import time
+
+import torch
+
+import _common
+from model_registry import model_memory_bytes, process_rss
+from quantization import load_quantized_model
+from transcription_engine import load_audio_file
+
+
+def load(size, precision):
+    import whisper
+    gc.collect()
+    rss_before = process_rss()
+    start = time.perf_counter()
+    model = load_quantized_model(size) if precision == "int8" else whisper.load_model(size, device="cpu")
+    load_seconds = time.perf_counter() - start
+    rss_after = process_rss()
+    rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    return model, load_seconds, rss_delta
+
+
+def run(model, audios, language):
+    texts, latencies = [], []
+    for audio in audios:
+        start = time.perf_counter()
+        result = model.transcribe(audio, language=language, fp16=False, condition_on_previous_text=False)
+        latencies.append(time.perf_counter() - start)
+        texts.append(result["text"].strip())
+    return texts, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="WAV/FLAC files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--language", default="en",
+                        help="fixed language keeps detection out of the comparison")
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads (default: torch's choice)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    fixtures = _common.find_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error("no fixtures found")
+    audios = [load_audio_file(p) for p in fixtures]
+    references = [_common.reference_text(p) for p in fixtures]
+    audio_seconds = sum(len(a) for a in audios) / 16000
+    print(f"{len(audios)} fixture(s), {audio_seconds:.1f}s of audio, {torch.get_num_threads()} torch thread(s)\n")
+
+    print(f"{'model':>6} {'precision':>9} {'load s':>7} {'p50 s':>7} {'p95 s':>7} {'RTF':>6} "
+          f"{'weights MB':>10} {'RSS +MB':>8} {'WER':>6}")
+    for size in args.models:
+        baseline_texts = None
+        for precision in ("fp32", "int8"):
+            model, load_seconds, rss_delta = load(size, precision)
+            model.transcribe(audios[0][:16000], language=args.language, fp16=False)  # warm-up
+            texts, latencies = run(model, audios, args.language)
+            if baseline_texts is None:
+                baseline_texts = texts
+            scored = [(ref, hyp) for ref, hyp in zip(references, texts) if ref]
+            if not scored and precision == "int8":
+                scored = list(zip(baseline_texts, texts))
+            wer = (sum(_common.word_error_rate(r, h) for r, h in scored) / len(scored)) if scored else float("nan")
+            rss = f"{rss_delta / 1024 ** 2:8.0f}" if rss_delta is not None else f"{'?':>8}"
+            print(f"{size:>6} {precision:>9} {load_seconds:7.2f} {_common.percentile(latencies, 50):7.2f} "
+                  f"{_common.percentile(latencies, 95):7.2f} {sum(latencies) / audio_seconds:6.3f} "
+                  f"{model_memory_bytes(model) / 1024 ** 2:10.0f} {rss} {wer:6.3f}")
+            del model
+    print("\nRSS growth is measured in one process, so later rows include allocator reuse;"
+          " run one model per process for exact numbers.")
+
+
+if __name__ == "__main__":
+    main()
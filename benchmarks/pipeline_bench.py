@@ -0,0 +1,277 @@
+"""End-to-end benchmark of the live pipeline without a microphone.
+
+Fixtures are replayed through a simulated PyAudio device (benchmarks/replay.py;
+48 kHz stereo unless ``--device-rate``/``--device-channels`` say otherwise)
+into the real AudioCapture -> resample -> AudioRingBuffer -> chunking/VAD ->
+transcribe path, at real time or ``--speed`` times faster. AudioCapture
+picks the stream format from the device, as it does in the app. The model is either a
+deterministic stub (pipeline overhead only) or a real Whisper model.
+
+Every configuration (model x device x chunk length x segmentation x
+decoding) runs in
+a fresh process so CPU time and peak RSS are its own, and reports latency
+percentiles (from the last sample of a chunk reaching the app to its text
+being ready), real-time factor, dropped audio, CPU use and peak RSS.
+Results are written as JSON; ``--compare`` prints the change against a
+previous run, e.g. one made on another commit. ``--decoding adaptive``
+lets the DecodingController pick decoding options per chunk; use
+``--stub-hard-every`` to give the stub fallback-prone chunks to react to.
+
+    python benchmarks/pipeline_bench.py --models stub tiny --chunks 3 5 -o bench.json
+    python benchmarks/pipeline_bench.py --synthetic 60 --speed 4 --compare bench.json
+    python benchmarks/pipeline_bench.py --synthetic 120 --stub-rtf 0.3 --stub-hard-every 3 --decoding fixed adaptive
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import _common
+from audio_pipeline import AudioCapture, AudioRingBuffer, BACKPRESSURE_POLICIES, DROP_OLDEST
+from decoding_controller import DecodingController
+from replay import FakePyAudio, StubModel, synthetic_speech
+from transcription_engine import load_audio_file
+from vad import VADSegmenter
+
+RATE = 16000
+RING_SECONDS = 30
+VAD_BLOCK_SECONDS = 0.25
+CONFIG_KEYS = ("model", "device", "chunk_seconds", "segmentation", "decoding")
+# For results written before a key existed
+CONFIG_DEFAULTS = {"decoding": "fixed"}
+COMPARED_METRICS = ("latency_p50", "latency_p95", "rtf", "dropped_seconds", "cpu_percent", "peak_rss_mb")
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        from model_registry import process_rss
+        rss = process_rss()  # no getrusage (Windows): current RSS is the best we have
+        return rss / 1024 ** 2 if rss is not None else None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def load_transcriber(model, device, language, stub_rtf, stub_hard_every=0):
+    if model == "stub":
+        stub = StubModel(rtf=stub_rtf, hard_every=stub_hard_every)
+        return lambda audio, **decode: stub.transcribe(audio, language=language, **decode)
+    from model_registry import ModelRegistry
+    from transcription_engine import TranscriptionEngine
+
+    engine = TranscriptionEngine(model, device, registry=ModelRegistry(warmup=True))
+    engine.load()
+    return lambda audio, **decode: engine.transcribe(audio, language=language or "auto", **decode)
+
+
+def run_config(config, audio, options):
+    """Replay ``audio`` through the live pipeline once; runs in a worker process."""
+    start = time.perf_counter()
+    transcribe = load_transcriber(config["model"], config["device"], options["language"], options["stub_rtf"],
+                                  options["stub_hard_every"])
+    load_seconds = time.perf_counter() - start
+
+    fake = FakePyAudio(audio, speed=options["speed"], device_rate=options["device_rate"],
+                       device_channels=options["device_channels"])
+    ring = AudioRingBuffer(RATE * RING_SECONDS, policy=options["policy"])
+    capture = AudioCapture(ring, pa_factory=fake)
+    chunk_buffer = np.zeros(RATE * RING_SECONDS, dtype=np.float32)
+    segmenter = (VADSegmenter(rate=RATE, max_segment_s=config["chunk_seconds"])
+                 if config["segmentation"] == "vad" else None)
+    controller = None
+    if config["decoding"] == "adaptive":
+        controller = DecodingController(max_backlog=max(6.0, 2 * config["chunk_seconds"]),
+                                        tune_threads=config["device"].startswith("cpu") and config["model"] != "stub")
+
+    latencies = []
+    busy = 0.0
+    consumed = 0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    capture.start()
+
+    def decode(end_position, samples):
+        nonlocal busy
+        if end_position > len(audio):
+            return  # trailing silence the fake stream padded with
+        decode_start = time.perf_counter()
+        transcribe(samples, **(controller.decode_options() if controller else {}))
+        done = time.perf_counter()
+        busy += done - decode_start
+        if controller is not None:
+            controller.observe(len(samples) / RATE, done - decode_start, ring.available / RATE)
+        captured = fake.stream.capture_time(end_position)
+        if captured is not None:
+            latencies.append(done - captured)
+
+    while True:
+        if fake.stream is not None and fake.stream.finished.is_set() and capture.running:
+            capture.stop()  # closes the ring; the reads below drain what is left
+        chunk_seconds = controller.chunk_seconds(config["chunk_seconds"]) if controller else config["chunk_seconds"]
+        chunk_seconds = min(chunk_seconds, RING_SECONDS / 2)
+        if segmenter is not None:
+            segmenter.set_max_segment(chunk_seconds)
+        read_size = int(RATE * (VAD_BLOCK_SECONDS if segmenter else chunk_seconds))
+        block = ring.read_chunk(read_size, chunk_buffer, timeout=0.2)
+        if block is None:
+            if capture.error is not None:
+                raise capture.error
+            if not capture.running and ring.available == 0:
+                break
+            continue
+        consumed += len(block)
+        # Dropped audio shifts later samples' positions in the original stream
+        dropped = ring.stats()["dropped_samples"]
+        if segmenter is None:
+            decode(consumed + dropped, block)
+        else:
+            for segment in segmenter.push(block):
+                decode(segment.end + dropped, segment.audio)
+    if segmenter is not None:
+        last = segmenter.flush()
+        if last is not None:
+            decode(min(last.end + ring.stats()["dropped_samples"], len(audio)), last.audio)
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    stats = ring.stats()
+    audio_seconds = len(audio) / RATE
+    return dict(config, **{
+        "audio_seconds": round(audio_seconds, 3),
+        "wall_seconds": round(wall, 3),
+        "load_seconds": round(load_seconds, 3),
+        "chunks": len(latencies),
+        "latency_p50": _common.percentile(latencies, 50),
+        "latency_p95": _common.percentile(latencies, 95),
+        "latency_p99": _common.percentile(latencies, 99),
+        "latency_max": max(latencies) if latencies else float("nan"),
+        "rtf": busy / audio_seconds,
+        "dropped_seconds": stats["dropped_samples"] / RATE,
+        "ring_overflows": stats["overflows"],
+        "device_overflows": capture.input_overflows,
+        "cpu_seconds": cpu,
+        "cpu_percent": 100.0 * cpu / wall if wall else float("nan"),
+        "peak_rss_mb": peak_rss_mb(),
+        "policy_changes": controller.changes if controller else 0,
+        "final_policy": controller.describe() if controller else None,
+    })
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_common.REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = {tuple(r.get(k, CONFIG_DEFAULTS.get(k)) for k in CONFIG_KEYS): r for r in baseline["results"]}
+    print(f"\nChange versus {baseline_path} (commit {baseline.get('commit') or '?'}):")
+    for result in results:
+        key = tuple(result[k] for k in CONFIG_KEYS)
+        if key not in old:
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            before, after = old[key].get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            pct = f" ({100 * (after - before) / before:+.0f}%)" if before else ""
+            changes.append(f"{metric} {before:.3g} -> {after:.3g}{pct}")
+        print(f"  {'/'.join(str(k) for k in key)}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="WAV/FLAC files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--synthetic", type=float, metavar="SECONDS",
+                        help="replay a deterministic synthetic signal instead of fixtures")
+    parser.add_argument("--models", nargs="+", default=["stub"], help="'stub' and/or Whisper sizes")
+    parser.add_argument("--devices", nargs="+", default=["cpu"], help="auto/cpu/cuda/cpu-int8 (ignored by stub)")
+    parser.add_argument("--chunks", type=float, nargs="+", default=[3.0, 5.0],
+                        help="chunk length, or maximum segment length with VAD")
+    parser.add_argument("--segmentation", nargs="+", choices=["fixed", "vad"], default=["fixed"])
+    parser.add_argument("--decoding", nargs="+", choices=["fixed", "adaptive"], default=["fixed"],
+                        help="fixed Whisper defaults, or the adaptive DecodingController")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (1 = real time)")
+    parser.add_argument("--policy", choices=BACKPRESSURE_POLICIES, default=DROP_OLDEST)
+    parser.add_argument("--device-rate", type=int, default=48000, help="simulated microphone's native rate")
+    parser.add_argument("--device-channels", type=int, default=2, help="simulated microphone's input channels")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--stub-rtf", type=float, default=0.05, help="stub model seconds per audio second")
+    parser.add_argument("--stub-hard-every", type=int, default=0, metavar="N",
+                        help="every N-th stub chunk needs the temperature fallback (0: never)")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    if args.speed <= 0:
+        parser.error("--speed must be positive; latency is measured against the replay clock")
+    if args.synthetic:
+        audio = synthetic_speech(args.synthetic)
+    else:
+        fixtures = _common.find_fixtures(args.fixtures)
+        if not fixtures:
+            parser.error("no fixtures found (add some or use --synthetic)")
+        # One continuous session with a second of silence between recordings
+        gap = np.zeros(RATE, dtype=np.float32)
+        audio = np.concatenate([part for p in fixtures for part in (load_audio_file(p), gap)])
+
+    options = {"speed": args.speed, "policy": args.policy, "language": args.language,
+               "device_rate": args.device_rate, "device_channels": args.device_channels,
+               "stub_rtf": args.stub_rtf, "stub_hard_every": args.stub_hard_every}
+    configs = []
+    for model in args.models:
+        for device in (["-"] if model == "stub" else args.devices):
+            for chunk in args.chunks:
+                for segmentation in args.segmentation:
+                    for decoding in args.decoding:
+                        configs.append({"model": model, "device": device, "chunk_seconds": chunk,
+                                        "segmentation": segmentation, "decoding": decoding})
+
+    print(f"Replaying {len(audio) / RATE:.1f}s of audio at {args.speed:g}x, policy {args.policy}\n")
+    print(f"{'model':>6} {'device':>8} {'chunk':>5} {'seg':>5} {'decode':>8} {'p50 s':>6} {'p95 s':>6} {'p99 s':>6} "
+          f"{'RTF':>6} {'dropped s':>9} {'CPU %':>6} {'peak MB':>8}")
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for config in configs:
+        # Fresh process per configuration: peak RSS and CPU time are its own
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_config, config, audio, options).result()
+        results.append(result)
+        peak = f"{result['peak_rss_mb']:8.0f}" if result["peak_rss_mb"] is not None else f"{'?':>8}"
+        print(f"{result['model']:>6} {result['device']:>8} {result['chunk_seconds']:5g} {result['segmentation']:>5} {result['decoding']:>8} "
+              f"{result['latency_p50']:6.2f} {result['latency_p95']:6.2f} {result['latency_p99']:6.2f} "
+              f"{result['rtf']:6.3f} {result['dropped_seconds']:9.2f} {result['cpu_percent']:6.1f} {peak}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count()},
+        "options": dict(options, audio_seconds=len(audio) / RATE,
+                        source="synthetic" if args.synthetic else "fixtures"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
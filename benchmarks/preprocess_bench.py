@@ -0,0 +1,91 @@
+"""Micro-benchmark: per-chunk preprocessing cost before/after the in-memory path.
+
+"legacy" replays what listen_continuously used to do for every chunk
+(temp WAV via mkstemp + wave, sf.read, float32 cast, unlink); "in-memory"
+is the live path: the capture thread converts each 1024-frame read
+straight into the AudioRingBuffer (write_pcm16) and the transcriber
+copies the chunk out (read_chunk).
+
+    python benchmarks/preprocess_bench.py --chunks 3 5 10 --repeat 50
+"""
+import argparse
+import os
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+import _common  # noqa: F401  (puts the repo root on sys.path)
+from audio_pipeline import AudioRingBuffer
+
+RATE = 16000
+CHUNK = 1024
+RING_SECONDS = 30  # as in the app
+
+
+def make_reads(seconds, rng):
+    n_reads = int(RATE / CHUNK * seconds)
+    pcm = rng.integers(-8000, 8000, size=n_reads * CHUNK, dtype=np.int16)
+    return [pcm[i * CHUNK:(i + 1) * CHUNK].tobytes() for i in range(n_reads)]
+
+
+def legacy_preprocess(frames):
+    import soundfile as sf
+
+    temp_fd, temp_path = tempfile.mkstemp(suffix=".wav")
+    os.close(temp_fd)
+    try:
+        wf = wave.open(temp_path, 'wb')
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(b''.join(frames))
+        wf.close()
+        audio_data, _ = sf.read(temp_path)
+        return audio_data.astype(np.float32)
+    finally:
+        os.unlink(temp_path)
+
+
+def in_memory_preprocess(frames, ring, out):
+    for data in frames:
+        ring.write_pcm16(data)
+    return ring.read_chunk(len(frames) * CHUNK, out, timeout=0)
+
+
+def time_it(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[3, 5, 10],
+                        help="chunk durations in seconds")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ring = AudioRingBuffer(RATE * max(RING_SECONDS, max(args.chunks)))
+    out = np.zeros(RATE * max(args.chunks), dtype=np.float32)
+
+    print(f"{'chunk':>6} {'legacy p50':>12} {'legacy p95':>12} {'memory p50':>12} {'memory p95':>12} {'speedup':>8}")
+    for seconds in args.chunks:
+        frames = make_reads(seconds, rng)
+        # Sanity check: both paths must produce identical samples
+        assert np.array_equal(legacy_preprocess(frames), in_memory_preprocess(frames, ring, out))
+
+        legacy = time_it(lambda: legacy_preprocess(frames), args.repeat)
+        memory = time_it(lambda: in_memory_preprocess(frames, ring, out), args.repeat)
+        print(f"{seconds:>5}s {legacy[0] * 1e3:>10.3f}ms {legacy[1] * 1e3:>10.3f}ms "
+              f"{memory[0] * 1e3:>10.3f}ms {memory[1] * 1e3:>10.3f}ms {legacy[0] / memory[0]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
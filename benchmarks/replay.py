@@ -0,0 +1,168 @@
+"""Stand-ins for the microphone and the model, for hardware-free benchmarks.
+
+``FakePyAudio`` is a drop-in ``pa_factory`` for ``AudioCapture``: its input
+stream plays a recording back at real time (or ``speed`` times faster),
+pacing ``read`` calls like a sound card would and raising PortAudio's
+input-overflow error when the reader falls further behind than the device
+buffer holds. It reports a device format (48 kHz stereo by default, like
+most USB headsets) and delivers the recording in whatever format the
+stream is opened with, so the capture's resampling path runs as in the
+app. It records when every block was "captured", so end-to-end latency
+can be measured against the moment a sample reached the app.
+
+``StubModel`` answers ``transcribe`` with a deterministic result after a
+fixed cost per call plus per audio second, so pipeline overhead can be
+measured without Whisper's compute noise. With ``hard_every`` it also
+imitates what makes real decoding cost vary: beam search costs more, and
+every n-th chunk fails its first pass and is decoded again at each
+fallback temperature it is given.
+"""
+import bisect
+import threading
+import time
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from audio_pipeline import PA_INPUT_OVERFLOWED
+
+
+class FakeStream:
+    def __init__(self, pcm, rate, speed, device_buffer_seconds, source_rate=16000):
+        self.pcm = pcm  # (frames, channels) int16
+        self.rate = rate
+        self.source_rate = source_rate
+        self.speed = speed
+        self.buffer_samples = int(rate * device_buffer_seconds)
+        self.position = 0
+        self.overflows = 0
+        self.finished = threading.Event()
+        self._closed = threading.Event()
+        self._start = None
+        # (stream position after the block, perf_counter when it was delivered)
+        self._ends = []
+        self._times = []
+
+    def _due(self, position):
+        return self._start + position / self.rate / self.speed
+
+    def read(self, n, exception_on_overflow=True):
+        if self._start is None:
+            self._start = time.perf_counter()
+        if self.position >= len(self.pcm):
+            # Past the end the "room" goes quiet until the capture stops
+            self.finished.set()
+            self._closed.wait(n / self.rate)
+            return bytes(2 * n * self.pcm.shape[1])
+
+        end = self.position + n
+        if self.speed > 0:
+            now = time.perf_counter()
+            due = self._due(end)
+            if now < due:
+                time.sleep(due - now)
+            elif (now - due) * self.rate * self.speed > self.buffer_samples:
+                # The device buffer would have wrapped; like PyAudio, the
+                # read that reports it is lost
+                self.overflows += 1
+                if exception_on_overflow:
+                    self.position = end
+                    raise OSError(PA_INPUT_OVERFLOWED, "Input overflowed")
+        block = self.pcm[self.position:end]
+        if len(block) < n:
+            block = np.concatenate([block, np.zeros((n - len(block), self.pcm.shape[1]), dtype=np.int16)])
+        self.position = end
+        self._ends.append(end)
+        self._times.append(time.perf_counter())
+        return block.tobytes()
+
+    def capture_time(self, position):
+        """When the sample at ``position`` of the 16 kHz recording was delivered to the app."""
+        position = -(-position * self.rate // self.source_rate)  # in device frames, rounded up
+        i = bisect.bisect_left(self._ends, position)
+        if i >= len(self._times):
+            return self._times[-1] if self._times else None
+        return self._times[i]
+
+    def stop_stream(self):
+        self._closed.set()
+
+    def close(self):
+        self._closed.set()
+
+
+class FakePyAudio:
+    """Replays ``audio`` (float32, 16 kHz) through a PyAudio-shaped interface."""
+
+    def __init__(self, audio, speed=1.0, device_buffer_seconds=0.5, device_rate=48000, device_channels=2):
+        self.audio = audio
+        self.speed = speed
+        self.device_buffer_seconds = device_buffer_seconds
+        self.device_rate = device_rate
+        self.device_channels = device_channels
+        self.stream = None
+
+    def __call__(self):
+        # AudioCapture calls pa_factory() to get a PyAudio instance
+        return self
+
+    def get_default_input_device_info(self):
+        return {"index": 0, "name": "replay", "defaultSampleRate": float(self.device_rate),
+                "maxInputChannels": self.device_channels}
+
+    def get_device_info_by_index(self, index):
+        return self.get_default_input_device_info()
+
+    def open(self, format, channels, rate, input=True, input_device_index=None, frames_per_buffer=1024):
+        # Converted before the clock starts, like audio arriving at the device
+        audio = self.audio if rate == 16000 else resample_poly(self.audio, rate, 16000)
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+        pcm = np.repeat(pcm[:, None], channels, axis=1)
+        self.stream = FakeStream(pcm, rate, self.speed, self.device_buffer_seconds)
+        return self.stream
+
+    def terminate(self):
+        pass
+
+
+class StubModel:
+    """Deterministic stand-in for a Whisper model."""
+
+    def __init__(self, seconds_per_call=0.02, rtf=0.05, rate=16000, hard_every=0):
+        self.seconds_per_call = seconds_per_call
+        self.rtf = rtf
+        self.rate = rate
+        self.hard_every = hard_every
+        self.calls = 0
+
+    def transcribe(self, audio, language=None, **options):
+        seconds = len(audio) / self.rate
+        self.calls += 1
+        passes = 1
+        if self.hard_every and self.calls % self.hard_every == 0:
+            temperature = options.get("temperature", (0.0, 0.2, 0.4, 0.6, 0.8, 1.0))
+            passes = len(temperature) if isinstance(temperature, (list, tuple)) else 1
+        beams = max(options.get("beam_size") or 1, 2) / 2
+        time.sleep(passes * beams * (self.seconds_per_call + self.rtf * seconds))
+        text = f"{seconds:.2f} seconds of audio"
+        return {
+            "text": text,
+            "language": language or "en",
+            "segments": [{
+                "id": 0, "seek": 0, "start": 0.0, "end": seconds, "text": text, "tokens": [],
+                "temperature": 0.0, "avg_logprob": -0.2, "compression_ratio": 1.0, "no_speech_prob": 0.01,
+            }],
+        }
+
+
+def synthetic_speech(seconds, rate=16000, seed=0):
+    """Deterministic test signal: ~2 s voiced bursts separated by ~1 s pauses."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate)
+    t = np.arange(n) / rate
+    audio = 0.003 * rng.standard_normal(n)
+    on = (t % 3.0) < 2.0
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    voiced = sum(np.sin(2 * np.pi * k * np.cumsum(pitch) / rate) / k for k in range(1, 6))
+    audio[on] += 0.2 * voiced[on] * (1 + 0.5 * np.sin(2 * np.pi * 4 * t[on]))
+    return audio.astype(np.float32)
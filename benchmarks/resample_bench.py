@@ -0,0 +1,108 @@
+"""Cost and quality of resampling capture audio to 16 kHz.
+
+Feeds a signal at a device rate (44.1/48 kHz, mono or stereo) through
+three resamplers in capture-sized reads:
+
+- ``stream``: StreamingResampler, as AudioCapture now uses it
+- ``fft``: ``scipy.signal.resample`` over each chunk (the old fallback)
+- ``poly``: ``scipy.signal.resample_poly`` on each chunk independently
+
+and reports CPU time per second of audio plus the SNR of the output against
+``resample_poly`` over the whole signal at once. Per-chunk resampling
+smears error at every chunk boundary; the streaming filter does not.
+
+    python benchmarks/resample_bench.py --rates 44100 48000 --channels 1 2
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy import signal
+
+import _common  # noqa: F401 (puts the repo root on sys.path)
+from audio_pipeline import StreamingResampler, downmix
+from replay import synthetic_speech
+
+RATE = 16000
+
+
+def device_signal(seconds, rate, channels):
+    """Synthetic speech at ``rate`` as interleaved int16, like a capture read."""
+    mono = synthetic_speech(seconds)
+    g = np.gcd(rate, RATE)
+    mono = signal.resample_poly(mono, rate // g, RATE // g)
+    # Slightly different channels, so the downmix does real work
+    frames = np.stack([mono * (1.0 - 0.1 * c) for c in range(channels)], axis=1)
+    return (np.clip(frames, -1, 1) * 32767).astype(np.int16).reshape(-1)
+
+
+def run_stream(pcm, rate, channels, block):
+    resampler = StreamingResampler(rate, RATE)
+    out = []
+    start = time.process_time()
+    for i in range(0, len(pcm), block * channels):
+        samples = pcm[i:i + block * channels].astype(np.float32) / 32768.0
+        out.append(resampler.process(downmix(samples, channels)))
+    elapsed = time.process_time() - start
+    # Align with the zero-phase reference
+    shift = int(round(resampler.delay))
+    return np.concatenate(out)[shift:], elapsed
+
+
+def run_chunked(pcm, rate, channels, block, method):
+    g = np.gcd(rate, RATE)
+    out = []
+    consumed = produced = 0
+    start = time.process_time()
+    for i in range(0, len(pcm), block * channels):
+        samples = downmix(pcm[i:i + block * channels].astype(np.float32) / 32768.0, channels)
+        # Round the running total, not each chunk, so the output doesn't
+        # drift against the reference and only edge error is measured
+        consumed += len(samples)
+        n = consumed * RATE // rate - produced
+        if method == "fft":
+            chunk = signal.resample(samples, n)
+        else:
+            chunk = signal.resample_poly(samples, RATE // g, rate // g)
+            chunk = np.pad(chunk, (0, max(n - len(chunk), 0)))[:n]
+        out.append(chunk.astype(np.float32))
+        produced += n
+    elapsed = time.process_time() - start
+    return np.concatenate(out), elapsed
+
+
+def snr_db(reference, output):
+    n = min(len(reference), len(output))
+    # Skip the ends, where the whole-signal reference has its own edge effects
+    margin = RATE // 10
+    ref, out = reference[margin:n - margin], output[margin:n - margin]
+    noise = float(np.dot(ref - out, ref - out))
+    return 10 * np.log10(float(np.dot(ref, ref)) / max(noise, 1e-20))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", type=int, nargs="+", default=[44100, 48000])
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--block", type=int, default=1024, help="frames per capture read")
+    args = parser.parse_args()
+
+    print(f"{args.seconds:g}s of audio in {args.block}-frame reads; cost is CPU ms per audio second\n")
+    print(f"{'rate':>6} {'ch':>2} {'method':>6} {'ms/s':>7} {'SNR dB':>7}")
+    for rate in args.rates:
+        for channels in args.channels:
+            pcm = device_signal(args.seconds, rate, channels)
+            mono = downmix(pcm.astype(np.float32) / 32768.0, channels)
+            g = np.gcd(rate, RATE)
+            reference = signal.resample_poly(mono, RATE // g, rate // g).astype(np.float32)
+            runs = [("stream", run_stream(pcm, rate, channels, args.block))]
+            for method in ("fft", "poly"):
+                runs.append((method, run_chunked(pcm, rate, channels, args.block, method)))
+            for method, (output, elapsed) in runs:
+                print(f"{rate:6d} {channels:2d} {method:>6} {elapsed * 1000 / args.seconds:7.3f} "
+                      f"{snr_db(reference, output):7.1f}")
+
+
+if __name__ == "__main__":
+    main()
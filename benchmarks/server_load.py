@@ -0,0 +1,146 @@
+"""Concurrent-stream capacity of a running transcription_server.py.
+
+Opens N WebSocket streams at once, each replaying fixture audio as 16 kHz
+PCM at real time (or ``--speed`` times faster), and measures how long
+after a segment's audio was sent its final transcript arrives. Each
+concurrency level in ``--streams`` is run in turn; the capacity is the
+largest level whose p95 final latency stays under ``--max-latency`` with
+no rejected streams.
+
+    python transcription_server.py --model base &
+    python benchmarks/server_load.py --streams 1 2 4 8 16 --seconds 60
+    python benchmarks/server_load.py --files 8   # concurrent POST /transcribe
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+import numpy as np
+
+import _common
+from replay import synthetic_speech
+from transcription_engine import load_audio_file
+
+RATE = 16000
+SEND_SECONDS = 0.1  # audio per WebSocket message, like a capture callback
+
+
+def load_source(args):
+    if args.synthetic:
+        return synthetic_speech(args.seconds)
+    fixtures = _common.find_fixtures(args.fixtures)
+    if not fixtures:
+        return synthetic_speech(args.seconds)
+    audio = np.concatenate([load_audio_file(p) for p in fixtures])
+    return audio[:int(args.seconds * RATE)]
+
+
+async def run_stream(session, url, pcm, speed, language, offset):
+    """One client; returns (final latencies, partial count, rejected)."""
+    latencies = []
+    partials = 0
+    query = f"?language={language}" if language else ""
+    async with session.ws_connect(url + query, max_msg_size=0) as ws:
+        start = time.perf_counter()
+        step = int(RATE * SEND_SECONDS) * 2
+
+        async def send():
+            # Staggered starting points so the streams aren't in lockstep
+            data = pcm[offset:] + pcm[:offset]
+            for i in range(0, len(data), step):
+                if speed > 0:
+                    delay = start + i / 2 / RATE / speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await ws.send_bytes(data[i:i + step])
+            await ws.send_str(json.dumps({"type": "eof"}))
+
+        sender = asyncio.ensure_future(send())
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            data = json.loads(msg.data)
+            if data["type"] == "final":
+                sent_at = start + data["end"] / (speed if speed > 0 else float("inf"))
+                latencies.append(time.perf_counter() - sent_at)
+            elif data["type"] == "partial":
+                partials += 1
+            elif data["type"] == "done":
+                break
+        rejected = ws.close_code == 1013
+        sender.cancel()
+    return latencies, partials, rejected
+
+
+async def stream_level(url, pcm, n, args):
+    async with aiohttp.ClientSession() as session:
+        step = len(pcm) // max(n, 1)
+        results = await asyncio.gather(*[
+            run_stream(session, url, pcm, args.speed, args.language, (i * step) & ~1) for i in range(n)
+        ], return_exceptions=True)
+    latencies, partials, rejected, errors = [], 0, 0, 0
+    for result in results:
+        if isinstance(result, Exception):
+            errors += 1
+            continue
+        latencies.extend(result[0])
+        partials += result[1]
+        rejected += result[2]
+    return latencies, partials, rejected, errors
+
+
+async def file_level(url, pcm, n, language):
+    query = "?format=pcm16" + (f"&language={language}" if language else "")
+    async with aiohttp.ClientSession() as session:
+        async def one():
+            start = time.perf_counter()
+            async with session.post(url + query, data=pcm) as response:
+                await response.read()
+                return time.perf_counter() - start, response.status
+        return await asyncio.gather(*[one() for _ in range(n)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="WAV/FLAC files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--files", type=int, default=0, help="instead of streams, POST this many files at once")
+    parser.add_argument("--seconds", type=float, default=60, help="audio per stream")
+    parser.add_argument("--synthetic", action="store_true", help="use a synthetic signal even if fixtures exist")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--max-latency", type=float, default=3.0, help="p95 final latency target, seconds")
+    args = parser.parse_args()
+
+    pcm = (np.clip(load_source(args), -1, 1) * 32767).astype("<i2").tobytes()
+    audio_seconds = len(pcm) / 2 / RATE
+
+    if args.files:
+        results = asyncio.run(file_level(args.url + "/transcribe", pcm, args.files, args.language))
+        times = [t for t, status in results if status == 200]
+        print(f"{args.files} concurrent file(s) of {audio_seconds:.0f}s: {len(times)} ok, "
+              f"{len(results) - len(times)} refused; p50 {_common.percentile(times, 50):.2f}s, "
+              f"max {max(times) if times else float('nan'):.2f}s, "
+              f"throughput {len(times) * audio_seconds / max(times or [1]):.1f} audio s/s")
+        return
+
+    ws_url = args.url.replace("http", "ws", 1) + "/stream"
+    print(f"{audio_seconds:.0f}s per stream at {args.speed:g}x\n")
+    print(f"{'streams':>7} {'finals':>6} {'partials':>8} {'p50 s':>6} {'p95 s':>6} {'max s':>6} "
+          f"{'rejected':>8} {'errors':>6}")
+    capacity = 0
+    for n in args.streams:
+        latencies, partials, rejected, errors = asyncio.run(stream_level(ws_url, pcm, n, args))
+        p95 = _common.percentile(latencies, 95)
+        print(f"{n:7d} {len(latencies):6d} {partials:8d} {_common.percentile(latencies, 50):6.2f} {p95:6.2f} "
+              f"{max(latencies) if latencies else float('nan'):6.2f} {rejected:8d} {errors:6d}")
+        if latencies and p95 <= args.max_latency and not rejected and not errors:
+            capacity = n
+    print(f"\nCapacity: {capacity} concurrent stream(s) with p95 final latency <= {args.max_latency:g}s")
+
+
+if __name__ == "__main__":
+    main()
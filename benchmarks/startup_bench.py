@@ -0,0 +1,123 @@
+"""How long the GUI takes to appear and to become usable.
+
+Two measurements, each in fresh Python processes (so nothing is cached in
+``sys.modules``) and repeated ``--repeat`` times, medians reported:
+
+- import cost of the heavy dependencies and of the app module itself
+- GUI startup: time from process start to the first window being mapped,
+  then to each background step finishing - microphones enumerated
+  (``mics``), torch imported (``torch``) and the default model loaded and
+  warmed up (``model``). Time-to-ready is the later of ``mics`` and
+  ``model``, when Start Listening becomes enabled.
+
+The GUI part needs a display; the import part runs anywhere.
+
+    python benchmarks/startup_bench.py --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import _common
+
+MODULES = ["numpy", "scipy.signal", "soundfile", "pyaudio", "torch", "whisper",
+           "audio_transcriber_whisper_local"]
+READY_STEPS = ("mics", "torch", "model")
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+try:
+    import {module}
+except ImportError:
+    print("null")
+else:
+    print(time.perf_counter() - start)
+"""
+
+
+def import_seconds(module):
+    code = IMPORT_SNIPPET.format(root=_common.REPO_ROOT, module=module)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=_common.REPO_ROOT)
+    return json.loads(out.stdout.strip() or "null")
+
+
+def run_gui(timeout):
+    """Child process: start the app, report milestones (seconds since ``started``)."""
+    started = float(os.environ["STARTUP_BENCH_T0"])
+    import tkinter as tk
+    from audio_transcriber_whisper_local import AudioTranscriberWhisperLocal
+
+    milestones = {"imported": time.time() - started}
+    root = tk.Tk()
+    app = AudioTranscriberWhisperLocal(root)
+    root.wait_visibility()
+    milestones["first_window"] = time.time() - started
+    deadline = time.time() + timeout
+    while time.time() < deadline and not set(READY_STEPS) <= app.ready:
+        root.update()
+        for step in app.ready:
+            milestones.setdefault(step, time.time() - started)
+        time.sleep(0.01)
+    root.destroy()
+    print(json.dumps(milestones))
+
+
+def gui_milestones(timeout):
+    env = dict(os.environ, STARTUP_BENCH_T0=repr(time.time()))
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--timeout", str(timeout)],
+                         capture_output=True, text=True, cwd=_common.REPO_ROOT, env=env)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "child failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def median(values):
+    values = sorted(v for v in values if v is not None)
+    return values[len(values) // 2] if values else None
+
+
+def fmt(seconds):
+    return f"{seconds:7.2f}" if seconds is not None else "      -"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for the app to become ready")
+    parser.add_argument("--no-gui", action="store_true", help="only measure import costs")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_gui(args.timeout)
+        return
+
+    print(f"Import cost, median of {args.repeat} fresh processes (s):")
+    for module in MODULES:
+        seconds = median([import_seconds(module) for _ in range(args.repeat)])
+        print(f"  {module:34s} {fmt(seconds) if seconds is not None else 'not installed'}")
+
+    if args.no_gui:
+        return
+    runs = []
+    for _ in range(args.repeat):
+        try:
+            runs.append(gui_milestones(args.timeout))
+        except RuntimeError as e:
+            print(f"\nGUI startup not measured: {e}")
+            return
+    print(f"\nGUI startup, median of {len(runs)} launches (s since process start):")
+    for key in ("imported", "first_window") + READY_STEPS:
+        print(f"  {key:34s} {fmt(median([run.get(key) for run in runs]))}")
+    ready = [max(run["mics"], run["model"]) if "mics" in run and "model" in run else None for run in runs]
+    print(f"  {'time-to-first-window':34s} {fmt(median([run.get('first_window') for run in runs]))}")
+    print(f"  {'time-to-ready':34s} {fmt(median(ready))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Time-to-first-word: fixed chunks versus streaming partial transcripts.
+
+Audio is replayed on a simulated real-time clock: a decode can only start
+once its audio has "arrived" and once the previous decode has finished,
+and each decode advances the clock by its measured wall time.
+
+    python benchmarks/streaming_bench.py meeting.wav --model base --chunk 5
+"""
+import argparse
+import time
+
+import numpy as np
+
+import _common
+from streaming import StreamingTranscriber
+from transcription_engine import load_audio_file
+
+RATE = 16000
+
+
+def chunked_first_word(model, audio, chunk_seconds, language):
+    n = int(RATE * chunk_seconds)
+    clock = 0.0
+    for i in range(0, len(audio) - n + 1, n):
+        clock = max(clock, (i + n) / RATE)
+        start = time.perf_counter()
+        text = model.transcribe(audio[i:i + n], language=language, fp16=False)["text"].strip()
+        clock += time.perf_counter() - start
+        if text:
+            return clock, text
+    return None, ""
+
+
+def streaming_first_word(model, audio, step_seconds, language):
+    streamer = StreamingTranscriber(model, language=language, step_seconds=step_seconds,
+                                    transcribe_options={"fp16": False})
+    step = int(RATE * step_seconds)
+    clock = 0.0
+    committed_at = None
+    first = None
+    for i in range(0, len(audio), step):
+        streamer.insert_audio(audio[i:i + step])
+        clock = max(clock, min(i + step, len(audio)) / RATE)
+        start = time.perf_counter()
+        committed, partial = streamer.process()
+        clock += time.perf_counter() - start
+        if first is None and (committed or partial):
+            first = (clock, committed or partial)
+        if committed:
+            committed_at = clock
+            break
+    return first, committed_at
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="WAV/FLAC files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--chunk", type=float, default=5)
+    parser.add_argument("--step", type=float, default=0.5)
+    args = parser.parse_args()
+
+    import whisper
+    model = whisper.load_model(args.model, device=args.device)
+
+    for path in _common.find_fixtures(args.fixtures):
+        audio = load_audio_file(path)
+        # Measure from the first audible sample so leading silence does not count
+        loud = np.abs(audio) > 0.02
+        onset = int(np.argmax(loud)) if loud.any() else 0
+        onset_s = onset / RATE
+        audio = audio[onset:]
+
+        chunk_time, chunk_text = chunked_first_word(model, audio, args.chunk, args.language)
+        first, committed_at = streaming_first_word(model, audio, args.step, args.language)
+        print(f"\n{path} (speech onset at {onset_s:.2f}s)")
+        if chunk_time is not None:
+            print(f"  fixed {args.chunk:g}s chunks: first text after {chunk_time:.2f}s {chunk_text[:40]!r}")
+        if first is not None:
+            print(f"  streaming ({args.step:g}s step): first partial after {first[0]:.2f}s {first[1][:40]!r}")
+        if committed_at is not None:
+            print(f"  streaming: first committed words after {committed_at:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
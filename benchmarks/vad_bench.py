@@ -0,0 +1,82 @@
+"""Decoder time saved by VAD segmentation versus fixed chunk_var windows.
+
+Replays a recorded fixture through both segmentation strategies and runs
+Whisper on every piece that would have been sent to ``model.transcribe``.
+
+    python benchmarks/vad_bench.py meeting.wav --model base --chunk 5
+    python benchmarks/vad_bench.py meeting.wav --no-model   # audio seconds only
+"""
+import argparse
+import time
+
+import _common
+from transcription_engine import load_audio_file
+from vad import create_vad, segment_audio
+
+RATE = 16000
+
+
+def fixed_chunks(audio, chunk_seconds):
+    n = int(RATE * chunk_seconds)
+    return [audio[i:i + n] for i in range(0, len(audio) - n + 1, n)]
+
+
+def vad_segments(audio, chunk_seconds, vad_name):
+    return [s.audio for s in segment_audio(audio, RATE, chunk_seconds, vad=create_vad(vad_name))]
+
+
+def decode_all(model, pieces, language):
+    texts = []
+    start = time.perf_counter()
+    for piece in pieces:
+        result = model.transcribe(piece, language=language, fp16=False)
+        texts.append(result["text"].strip())
+    return time.perf_counter() - start, " ".join(t for t in texts if t)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="*", help="WAV/FLAC files or directories (default: benchmarks/fixtures)")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--chunk", type=float, default=5, help="fixed chunk / max VAD segment length (s)")
+    parser.add_argument("--vad", default="energy", choices=["energy", "webrtc"])
+    parser.add_argument("--no-model", action="store_true", help="only compare how much audio reaches the decoder")
+    args = parser.parse_args()
+
+    fixtures = _common.find_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error("no fixtures found")
+
+    model = None
+    if not args.no_model:
+        import whisper
+        model = whisper.load_model(args.model, device=args.device)
+
+    for path in fixtures:
+        audio = load_audio_file(path)
+        fixed = fixed_chunks(audio, args.chunk)
+        voiced = vad_segments(audio, args.chunk, args.vad)
+        fixed_audio = sum(len(c) for c in fixed) / RATE
+        vad_audio = sum(len(s) for s in voiced) / RATE
+
+        print(f"\n{path} ({len(audio) / RATE:.1f}s)")
+        print(f"  fixed: {len(fixed):4d} calls, {fixed_audio:8.1f}s of audio to decoder")
+        print(f"  vad:   {len(voiced):4d} calls, {vad_audio:8.1f}s of audio to decoder "
+              f"({100 * (1 - vad_audio / max(fixed_audio, 1e-9)):.0f}% less)")
+        if model is None:
+            continue
+
+        fixed_time, fixed_text = decode_all(model, fixed, args.language)
+        vad_time, vad_text = decode_all(model, voiced, args.language)
+        print(f"  decoder time: fixed {fixed_time:.2f}s, vad {vad_time:.2f}s "
+              f"-> saved {fixed_time - vad_time:.2f}s ({100 * (1 - vad_time / max(fixed_time, 1e-9)):.0f}%)")
+        reference = _common.reference_text(path)
+        if reference:
+            print(f"  WER: fixed {_common.word_error_rate(reference, fixed_text):.3f}, "
+                  f"vad {_common.word_error_rate(reference, vad_text):.3f}")
+
+
+if __name__ == "__main__":
+    main()
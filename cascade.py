@@ -0,0 +1,160 @@
+"""Confidence cascade: a fast model for every segment, a larger one for weak ones.
+
+``tiny`` keeps up with live audio on a CPU but makes mistakes; ``small``
+and up are accurate but fall behind. In cascade mode everything is decoded
+with the fast model and shown at once. Segments whose decode looks weak -
+low ``avg_logprob``, a high ``compression_ratio`` (repetition loops) or text
+where the model thinks there is no speech (likely hallucination) - are
+queued for the larger model on a background thread, and the better text
+replaces the provisional line when it arrives.
+
+The queue is bounded: when the larger model cannot keep up, further
+segments keep their fast-model text instead of building a backlog.
+"""
+import os
+import queue
+import sys
+import threading
+import time
+
+
+def _ignore(message):
+    pass
+
+
+def weak_reason(result, logprob_threshold=-0.8, compression_ratio_threshold=2.2, no_speech_threshold=0.5):
+    """Why ``result`` should be re-decoded ("low_logprob", ...), or None if it looks fine."""
+    for segment in result.get("segments") or []:
+        if not segment.get("text", "").strip():
+            continue
+        if segment.get("no_speech_prob", 0.0) > no_speech_threshold:
+            return "no_speech"
+        if segment.get("compression_ratio", 0.0) > compression_ratio_threshold:
+            return "repetitive"
+        if segment.get("avg_logprob", 0.0) < logprob_threshold:
+            return "low_logprob"
+    return None
+
+
+class ConfidenceCascade:
+    """Re-decodes weak segments with ``engine`` (the larger model) on a worker thread.
+
+    Call ``observe`` with every fast-model result; it returns True when the
+    segment was queued, and ``on_done(result)`` is later called on the
+    worker thread with the larger model's result.
+    """
+
+    def __init__(self, engine, max_pending=4, nice=10, log=_ignore, **thresholds):
+        self.engine = engine
+        self.nice = nice
+        self.log = log
+        self.thresholds = thresholds
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+        self.segments = 0
+        self.audio_seconds = 0.0
+        self.fast_seconds = 0.0
+        self.escalated = 0
+        self.skipped = 0  # weak, but the queue was full
+        self.changed = 0
+        self.failed = 0
+        self.slow_seconds = 0.0
+        self.slow_audio_seconds = 0.0
+        self.reasons = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def observe(self, audio, result, seconds, on_done, rate=16000):
+        """Account for one fast decode (``seconds`` long) and escalate it if weak."""
+        self.segments += 1
+        self.audio_seconds += len(audio) / rate
+        self.fast_seconds += seconds
+        if not result.get("text", "").strip():
+            return False
+        reason = weak_reason(result, **self.thresholds)
+        if reason is None:
+            return False
+        try:
+            # The caller's buffer is reused for the next chunk
+            self._queue.put_nowait((audio.copy(), result.get("language"), result["text"].strip(), on_done, rate))
+        except queue.Full:
+            self.skipped += 1
+            return False
+        self.escalated += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        return True
+
+    def close(self, wait=True):
+        """Stop the worker, by default after it finishes the queued segments."""
+        if self._thread is None:
+            return
+        if not wait:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def summary(self):
+        """One-line report: share escalated and compute against the large model on everything."""
+        if not self.segments:
+            return None
+        name = self.engine.model_size
+        line = (f"escalated {self.escalated} of {self.segments} segment(s) "
+                f"({100.0 * self.escalated / self.segments:.0f}%) to {name}, {self.changed} changed")
+        if self.skipped:
+            line += f", {self.skipped} weak kept (queue full)"
+        if self.failed:
+            line += f", {self.failed} failed"
+        if self.slow_audio_seconds > 0:
+            # The larger model's measured speed, applied to all the audio
+            all_slow = self.slow_seconds / self.slow_audio_seconds * self.audio_seconds
+            used = self.fast_seconds + self.slow_seconds
+            line += (f"; compute {used:.1f}s vs ~{all_slow:.1f}s running {name} on everything "
+                     f"({100.0 * (1 - used / all_slow):.0f}% saved)")
+        return line
+
+    def _lower_priority(self):
+        # On Linux niceness is per thread, so only this worker yields to the
+        # live path; elsewhere the whole process would be affected, so skip
+        if self.nice and sys.platform.startswith("linux"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+            except (AttributeError, OSError):
+                pass
+
+    def _run(self):
+        self._lower_priority()
+        try:
+            if not self.engine.loaded:
+                self.engine.load()
+        except Exception as e:
+            self.log(f"[Cascade disabled: could not load {self.engine.model_size}: {e}]\n")
+            while self._queue.get() is not None:
+                self.failed += 1
+            return
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            audio, language, fast_text, on_done, rate = job
+            start = time.perf_counter()
+            try:
+                # The fast model already found the language; don't detect again
+                result = self.engine.transcribe(audio, language=language or "auto")
+            except Exception as e:
+                self.failed += 1
+                self.log(f"[Cascade decode failed: {e}]\n")
+                continue
+            self.slow_seconds += time.perf_counter() - start
+            self.slow_audio_seconds += len(audio) / rate
+            if result["text"].strip() and result["text"].strip() != fast_text:
+                self.changed += 1
+                on_done(result)
@@ -0,0 +1,53 @@
+"""Helpers shared by the code paths that call ``whisper.decode`` themselves.
+
+``transcribe_short`` (reduced encoder context) and ``BatchScheduler``
+(batched decoding) bypass ``model.transcribe``, so they re-implement its
+temperature fallback and result shape with the functions here. whisper is
+only imported when DecodingOptions are built.
+"""
+SAMPLE_RATE = 16000
+
+
+def decoding_options(temperature, language=None, prompt=None, fp16=False, **options):
+    """DecodingOptions for one step of the temperature ladder (as transcribe() does it)."""
+    import whisper
+
+    if temperature > 0:
+        options.setdefault("best_of", 5)
+        options.pop("beam_size", None)
+        options.pop("patience", None)
+    else:
+        options.pop("best_of", None)
+    return whisper.DecodingOptions(task="transcribe", language=language, temperature=temperature,
+                                   prompt=prompt, without_timestamps=True, fp16=fp16, **options)
+
+
+def is_silence(result, logprob_threshold=-1.0, no_speech_threshold=0.6):
+    """transcribe()'s rule for treating a decode as no speech."""
+    return result.no_speech_prob > no_speech_threshold and result.avg_logprob < logprob_threshold
+
+
+def needs_fallback(result, compression_ratio_threshold=2.4, logprob_threshold=-1.0, no_speech_threshold=0.6):
+    """transcribe()'s rule for re-decoding at the next temperature."""
+    if is_silence(result, logprob_threshold, no_speech_threshold):
+        return False
+    return result.compression_ratio > compression_ratio_threshold or result.avg_logprob < logprob_threshold
+
+
+def decoding_to_transcript(result, n_samples, logprob_threshold=-1.0, no_speech_threshold=0.6, **extra):
+    """Wrap a single-window DecodingResult in a transcribe()-shaped dict."""
+    text = "" if is_silence(result, logprob_threshold, no_speech_threshold) else result.text.strip()
+    segment = {
+        "id": 0,
+        "seek": 0,
+        "start": 0.0,
+        "end": n_samples / SAMPLE_RATE,
+        "text": text,
+        "tokens": result.tokens,
+        "temperature": result.temperature,
+        "avg_logprob": result.avg_logprob,
+        "compression_ratio": result.compression_ratio,
+        "no_speech_prob": result.no_speech_prob,
+    }
+    segment.update(extra)
+    return {"text": text, "language": result.language, "segments": [segment] if text else []}
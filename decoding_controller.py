@@ -0,0 +1,178 @@
+"""Feedback control of decoding cost, to keep the live loop real time.
+
+``model.transcribe`` with fixed options costs whatever the audio makes it
+cost: a hard chunk triggers the temperature fallback and is decoded up to
+six times, the loop falls behind and the backlog only grows. The
+controller watches the real-time factor (decode seconds per audio second)
+and the capture backlog after every chunk and moves along a ladder of
+decoding policies:
+
+- ``beam5``: beam search (5 beams), full temperature ladder
+- ``greedy``: Whisper's defaults (where a session starts)
+- ``short-ladder``: at most three fallback temperatures, best of 2
+- ``no-fallback``: one greedy pass, no conditioning on previous text
+- ``long-chunks``: as above, with chunks twice as long (the encoder pads
+  every chunk to 30 s, so longer chunks cost less per audio second)
+
+It steps down as soon as the smoothed RTF exceeds ``target_rtf`` or the
+backlog passes ``max_backlog`` seconds, and steps back up only after
+``patience`` calm chunks, and only when the richer policy's predicted RTF
+(scaled by relative cost) stays under the target. An upgrade that has to
+be undone straight away doubles the patience before the next try, so the
+controller does not oscillate around the limit.
+
+On CPU, the torch thread count is part of the policy: it is raised to
+``max_threads`` (the CPU budget) before decoding is degraded, and lowered
+again when the best policy has plenty of headroom. The count is process
+wide, so ``close()`` puts back the one the session started with; pass the
+budget measured at startup as ``max_threads``, not whatever the previous
+session left behind.
+"""
+from collections import namedtuple
+
+FULL_LADDER = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# cost: rough decode time relative to "greedy"
+DecodingStep = namedtuple("DecodingStep", ["name", "options", "cost", "chunk_scale"])
+
+STEPS = [
+    DecodingStep("beam5", {"beam_size": 5, "best_of": 5, "temperature": FULL_LADDER,
+                           "condition_on_previous_text": True}, 2.5, 1.0),
+    DecodingStep("greedy", {"temperature": FULL_LADDER, "condition_on_previous_text": True}, 1.0, 1.0),
+    DecodingStep("short-ladder", {"best_of": 2, "temperature": (0.0, 0.4, 0.8),
+                                  "condition_on_previous_text": True}, 0.8, 1.0),
+    DecodingStep("no-fallback", {"temperature": (0.0,), "condition_on_previous_text": False}, 0.6, 1.0),
+    DecodingStep("long-chunks", {"temperature": (0.0,), "condition_on_previous_text": False}, 0.4, 2.0),
+]
+DEFAULT_STEP = 1
+
+
+def _ignore(message):
+    pass
+
+
+class DecodingController:
+    def __init__(self, target_rtf=0.8, max_backlog=6.0, patience=5, cooldown=2, smoothing=0.3,
+                 max_threads=None, min_threads=1, tune_threads=False, steps=STEPS, start=DEFAULT_STEP,
+                 log=_ignore):
+        self.target_rtf = target_rtf
+        self.max_backlog = max_backlog
+        self.patience = patience
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.steps = steps
+        self.step = start
+        self.log = log
+
+        self.tune_threads = tune_threads
+        self.threads = None
+        self.max_threads = max_threads
+        self.min_threads = min_threads
+        self._original_threads = None
+        if tune_threads:
+            import torch
+            self.threads = self._original_threads = torch.get_num_threads()
+            self.max_threads = max_threads or self.threads
+            self._set_threads(min(self.threads, self.max_threads))
+
+        self.rtf = None  # smoothed over recent chunks
+        self.backlog = 0.0
+        self._patience = patience
+        self._calm = 0
+        self._since_change = 0
+        self._upgraded = False  # the last change restored quality
+        self.changes = 0
+
+    def close(self):
+        """Restore the torch thread count from before the controller was created."""
+        if self._original_threads is not None and self.threads != self._original_threads:
+            self._set_threads(self._original_threads)
+        self._original_threads = None
+
+    @property
+    def policy(self):
+        return self.steps[self.step]
+
+    def decode_options(self):
+        """Keyword arguments for ``transcribe`` under the current policy."""
+        return dict(self.policy.options)
+
+    def chunk_seconds(self, base):
+        return base * self.policy.chunk_scale
+
+    def describe(self):
+        """Short form for the status bar, e.g. "greedy, 4 threads, RTF 0.62"."""
+        parts = [self.policy.name]
+        if self.threads is not None:
+            parts.append(f"{self.threads} thread{'s' if self.threads != 1 else ''}")
+        if self.rtf is not None:
+            parts.append(f"RTF {self.rtf:.2f}")
+        return ", ".join(parts)
+
+    def observe(self, audio_seconds, decode_seconds, backlog_seconds):
+        """Record one decoded chunk; returns True if the policy changed."""
+        if audio_seconds <= 0:
+            return False
+        rtf = decode_seconds / audio_seconds
+        self.rtf = rtf if self.rtf is None else (1 - self.smoothing) * self.rtf + self.smoothing * rtf
+        self.backlog = backlog_seconds
+        self._since_change += 1
+
+        overloaded = self.rtf > self.target_rtf or backlog_seconds > self.max_backlog
+        # A runaway backlog doesn't wait out the cooldown
+        if overloaded and (self._since_change >= self.cooldown or backlog_seconds > 2 * self.max_backlog):
+            if self._upgraded and self._since_change <= self._patience:
+                self._patience = min(self._patience * 2, 64 * self.patience)
+            self._calm = 0
+            return self._shed_load()
+        if self._upgraded and self._since_change > self._patience:
+            self._patience = self.patience  # the upgrade held
+        calm = self.rtf < self.target_rtf * 0.7 and backlog_seconds < self.max_backlog / 4
+        self._calm = self._calm + 1 if calm else 0
+        if self._calm >= self._patience:
+            self._calm = 0
+            return self._restore_quality()
+        return False
+
+    def _predicted_rtf(self, step):
+        return self.rtf * self.steps[step].cost / self.policy.cost
+
+    def _shed_load(self):
+        self._upgraded = False
+        if self.tune_threads and self.threads < self.max_threads:
+            return self._set_threads(min(self.max_threads, self.threads * 2), "behind")
+        if self.step + 1 < len(self.steps):
+            return self._move(self.step + 1, "behind")
+        return False
+
+    def _restore_quality(self):
+        if self.step > 0 and self._predicted_rtf(self.step - 1) < self.target_rtf * 0.8:
+            self._upgraded = True
+            return self._move(self.step - 1, "headroom")
+        if (self.tune_threads and self.step == 0 and self.threads > self.min_threads
+                and self.rtf * 2 < self.target_rtf * 0.8):
+            # Halving the threads at worst doubles the RTF; give the cores back
+            self._upgraded = True
+            return self._set_threads(max(self.min_threads, self.threads // 2), "headroom")
+        return False
+
+    def _move(self, step, reason):
+        old = self.policy.name
+        self.step = step
+        self._changed(f"{old} -> {self.policy.name}", reason)
+        return True
+
+    def _set_threads(self, threads, reason=None):
+        import torch
+
+        old = self.threads
+        torch.set_num_threads(threads)
+        self.threads = threads
+        if reason is not None:
+            self._changed(f"{old} -> {threads} threads", reason)
+        return True
+
+    def _changed(self, what, reason):
+        self.changes += 1
+        self._since_change = 0
+        self.log(f"[Decoding: {what} ({reason}: RTF {self.rtf:.2f}, backlog {self.backlog:.1f}s)]\n")
@@ -0,0 +1,114 @@
+"""Adaptive session language pinning for "auto" language mode.
+
+Without a language, every ``transcribe`` call runs language detection over
+the padded mel first, and the detected label can flip between chunks of
+the same conversation. LanguagePolicy detects on the first few confident
+chunks, pins the majority language for the session, and afterwards only
+detects again every ``reprobe_every`` chunks or when decoding quality
+drops (which is what speaking a different language looks like to a pinned
+decoder).
+"""
+import threading
+from collections import Counter, deque
+
+
+def result_confidence(result):
+    """(avg_logprob, no_speech_prob) averaged over a result's segments."""
+    segments = result.get("segments") or []
+    if not segments:
+        return None, None
+    avg_logprob = sum(s.get("avg_logprob", 0.0) for s in segments) / len(segments)
+    no_speech = sum(s.get("no_speech_prob", 0.0) for s in segments) / len(segments)
+    return avg_logprob, no_speech
+
+
+class LanguagePolicy:
+    """Decides per chunk whether to detect the language or reuse a pinned one."""
+
+    def __init__(self, probe_chunks=3, min_share=0.6, logprob_floor=-0.8, no_speech_ceiling=0.5,
+                 reprobe_every=50, degrade_after=3, log=None):
+        self.probe_chunks = probe_chunks
+        self.min_share = min_share
+        self.logprob_floor = logprob_floor
+        self.no_speech_ceiling = no_speech_ceiling
+        self.reprobe_every = reprobe_every
+        self.degrade_after = degrade_after
+        self.log = log or (lambda message: None)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.pinned = None
+            self._votes = deque(maxlen=self.probe_chunks)
+            self._since_pin = 0
+            self._bad_run = 0
+            self.detections_run = 0
+            self.detections_skipped = 0
+            self.repins = 0
+
+    def language_for_chunk(self):
+        """Language to pass to transcribe, or None to let Whisper detect it."""
+        with self._lock:
+            if self.pinned is None or self._since_pin >= self.reprobe_every:
+                self.detections_run += 1
+                return None
+            self.detections_skipped += 1
+            return self.pinned
+
+    def observe(self, result, requested_language):
+        """Feed back the result of a chunk transcribed with ``requested_language``."""
+        avg_logprob, no_speech = result_confidence(result)
+        if avg_logprob is None:
+            return  # nothing said; tells us nothing about the language
+        confident = avg_logprob >= self.logprob_floor and no_speech <= self.no_speech_ceiling
+        speech = no_speech <= self.no_speech_ceiling
+        detected = result.get("language")
+
+        with self._lock:
+            if requested_language is None:
+                self._observe_probe(detected, confident)
+            elif speech:
+                self._since_pin += 1
+                self._bad_run = 0 if confident else self._bad_run + 1
+                if self._bad_run >= self.degrade_after:
+                    self.log(f"[Language: quality dropped with '{self.pinned}' pinned - detecting again]\n")
+                    self._unpin()
+
+    def _observe_probe(self, detected, confident):
+        # Caller holds the lock
+        if self.pinned is not None:
+            # Periodic re-probe while pinned
+            self._since_pin = 0
+            if confident and detected != self.pinned:
+                self.log(f"[Language: re-probe heard '{detected}' instead of '{self.pinned}' - detecting again]\n")
+                self._unpin()
+                self._votes.append(detected)
+            return
+        if not confident or not detected:
+            return
+        self._votes.append(detected)
+        if len(self._votes) < self.probe_chunks:
+            return
+        language, count = Counter(self._votes).most_common(1)[0]
+        if count / len(self._votes) >= self.min_share:
+            self.pinned = language
+            self._since_pin = 0
+            self._bad_run = 0
+            self.repins += 1
+            self.log(f"[Language pinned for this session: {language}]\n")
+
+    def _unpin(self):
+        self.pinned = None
+        self._votes.clear()
+        self._since_pin = 0
+        self._bad_run = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pinned": self.pinned,
+                "detections_run": self.detections_run,
+                "detections_skipped": self.detections_skipped,
+                "repins": self.repins,
+            }
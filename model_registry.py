@@ -0,0 +1,206 @@
+"""Cache of loaded Whisper models keyed by (size, device, precision).
+
+Loading a model from disk takes seconds and the first decode after a load
+is much slower than steady state (allocator warm-up, kernel selection,
+lazy initialisation). The registry keeps recently used models resident
+within a memory budget, evicting the least recently used, runs a warm-up
+decode on synthetic audio right after loading, and can preload a model on
+a background thread.
+
+torch and whisper are only imported when the first model is loaded.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MEMORY_BUDGET = 4 * 1024 ** 3
+
+
+def _ignore(message):
+    pass
+
+
+def process_rss():
+    """Resident set size of this process in bytes, or None if unknown."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def model_memory_bytes(model):
+    """Bytes held by a model's parameters and buffers (and int8 weights)."""
+    from quantization import quantized_weight_bytes
+
+    total = quantized_weight_bytes(model)
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        if tensor.is_sparse:
+            continue
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelEntry:
+    def __init__(self, key, model, load_seconds, memory_bytes, rss_delta):
+        self.key = key
+        self.model = model
+        self.load_seconds = load_seconds
+        self.warmup_seconds = None
+        self.memory_bytes = memory_bytes
+        self.rss_delta = rss_delta
+        self.hits = 0
+
+    def describe(self):
+        size, device, precision = self.key
+        warmup = f", warm-up {self.warmup_seconds:.2f}s" if self.warmup_seconds is not None else ""
+        rss = f", RSS +{self.rss_delta / 1024 ** 2:.0f} MB" if self.rss_delta is not None else ""
+        return (f"{size}/{device}/{precision}: load {self.load_seconds:.2f}s{warmup}, "
+                f"weights ~{self.memory_bytes / 1024 ** 2:.0f} MB{rss}")
+
+
+class ModelRegistry:
+    """Thread-safe LRU of loaded models with a memory budget."""
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, warmup=True, log=_ignore):
+        self.memory_budget = memory_budget
+        self.warmup = warmup
+        self.log = log
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @staticmethod
+    def make_key(size, device, precision="fp32"):
+        return (size, device, precision)
+
+    def get(self, size, device, precision="fp32"):
+        """Return a loaded (and warmed-up) model, loading it if needed."""
+        return self.get_entry(size, device, precision).model
+
+    def get_entry(self, size, device, precision="fp32"):
+        key = self.make_key(size, device, precision)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Per-key lock: a second caller for the same model (e.g. Load Model
+        # clicked while the startup preload is running) waits instead of
+        # loading a duplicate copy
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    entry.hits += 1
+                    return entry
+            entry = self._load(key)
+            with self._lock:
+                self._entries[key] = entry
+                self._evict_over_budget(keep=key)
+            return entry
+
+    def preload(self, size, device, precision="fp32", on_done=None):
+        """Load a model on a daemon thread; ``on_done(entry, error)`` is called after."""
+        def run():
+            try:
+                entry = self.get_entry(size, device, precision)
+            except Exception as e:
+                if on_done:
+                    on_done(None, e)
+                return
+            if on_done:
+                on_done(entry, None)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def cached_keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return [{
+                "key": entry.key,
+                "load_seconds": entry.load_seconds,
+                "warmup_seconds": entry.warmup_seconds,
+                "memory_bytes": entry.memory_bytes,
+                "rss_delta": entry.rss_delta,
+                "hits": entry.hits,
+            } for entry in self._entries.values()]
+
+    def evict(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._release(entry)
+
+    def _evict_over_budget(self, keep):
+        # Caller holds self._lock
+        total = sum(e.memory_bytes for e in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.memory_budget:
+                break
+            if key == keep:
+                continue
+            entry = self._entries.pop(key)
+            total -= entry.memory_bytes
+            self.log(f"[Evicted cached model {'/'.join(key)} to stay within memory budget]\n")
+            self._release(entry)
+
+    @staticmethod
+    def _release(entry):
+        # Callers that still hold the model keep it alive; we only drop our reference
+        device = entry.key[1]
+        entry.model = None
+        if device == "cuda":
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def _load(self, key):
+        size, device, precision = key
+        rss_before = process_rss()
+        start = time.perf_counter()
+        model = self._load_model(size, device, precision)
+        load_seconds = time.perf_counter() - start
+        rss_after = process_rss()
+        rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+
+        entry = ModelEntry(key, model, load_seconds, model_memory_bytes(model), rss_delta)
+        if self.warmup:
+            start = time.perf_counter()
+            self._warm_up(model, precision)
+            entry.warmup_seconds = time.perf_counter() - start
+        self.log(f"[Model {entry.describe()}]\n")
+        return entry
+
+    def _load_model(self, size, device, precision):
+        if precision == "int8":
+            from quantization import load_quantized_model
+            return load_quantized_model(size, log=self.log)
+        import whisper
+        return whisper.load_model(size, device=device)
+
+    @staticmethod
+    def _warm_up(model, precision):
+        import torch
+        import whisper
+
+        # One encoder pass over a full window plus a few decoder steps on
+        # quiet noise exercises the same kernels a real chunk will
+        rng = np.random.default_rng(0)
+        audio = (rng.standard_normal(whisper.audio.SAMPLE_RATE) * 1e-3).astype(np.float32)
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels).to(model.device)
+        options = whisper.DecodingOptions(language="en", without_timestamps=True, sample_len=8,
+                                          fp16=(precision == "fp16"))
+        with torch.no_grad():
+            whisper.decode(model, mel, options)
@@ -0,0 +1,297 @@
+"""Transcribe several audio sources at once with one shared model.
+
+Each source (a microphone, a file replayed in real time, or a TCP socket
+carrying raw PCM) is captured on its own thread into its own ring buffer
+and cut into speech segments by a VAD. All segments go to one
+BatchScheduler, which decodes whatever is pending together, and each
+result is routed back to its source's transcript.
+
+    python multi_source.py --model small --mic 1 --mic 4 --listen 9000 -o transcripts/
+
+A socket source accepts one client at a time sending 16 kHz mono int16
+little-endian PCM, e.g. ``ffmpeg -i in.wav -f s16le -ar 16000 -ac 1 - | nc host 9000``.
+It keeps accepting new clients until Ctrl+C; with ``--once`` it ends when
+its first client disconnects, so a socket-only run finishes by itself.
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from audio_pipeline import AudioCapture, AudioRingBuffer, BLOCK, DROP_OLDEST
+from batch_scheduler import BatchScheduler
+from language_policy import LanguagePolicy
+from transcription_engine import TranscriptionEngine, load_audio_file
+from vad import VADSegmenter
+
+RATE = 16000
+RING_SECONDS = 30
+BLOCK_SECONDS = 0.25
+
+
+class AudioSource:
+    """Base class: something that fills ``self.ring`` on a background thread."""
+
+    def __init__(self, name, policy=DROP_OLDEST):
+        self.name = name
+        self.ring = AudioRingBuffer(RATE * RING_SECONDS, policy=policy)
+
+    def start(self):
+        raise NotImplementedError
+
+    def stop(self):
+        self.ring.close()
+
+    @property
+    def finished(self):
+        return False
+
+
+class MicrophoneSource(AudioSource):
+    def __init__(self, name, device_index):
+        super().__init__(name)
+        self.capture = AudioCapture(self.ring, device_index=device_index)
+
+    def start(self):
+        self.capture.start()
+
+    def stop(self):
+        self.capture.stop()
+
+    @property
+    def finished(self):
+        return not self.capture.running
+
+
+class FileSource(AudioSource):
+    """Replays a file into the ring, in real time unless ``speed`` says otherwise."""
+
+    def __init__(self, name, path, speed=1.0):
+        # A file can wait for the decoder instead of losing audio
+        super().__init__(name, policy=BLOCK)
+        self.path = path
+        self.speed = speed
+        self.error = None
+        self._done = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        try:
+            audio = load_audio_file(self.path)
+            block = int(RATE * BLOCK_SECONDS)
+            start = time.perf_counter()
+            for i in range(0, len(audio), block):
+                if self.speed > 0:
+                    delay = start + i / RATE / self.speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                self.ring.write(audio[i:i + block])
+        except Exception as e:
+            self.error = e
+        finally:
+            # Always end the source, or its worker would wait for audio forever
+            self._done.set()
+            self.ring.close()
+
+    @property
+    def finished(self):
+        return self._done.is_set()
+
+
+class SocketSource(AudioSource):
+    """TCP listener for raw 16 kHz mono int16 PCM, one client at a time.
+
+    With ``once`` the source finishes when its first client disconnects;
+    otherwise only ``stop()`` ends it.
+    """
+
+    def __init__(self, name, port, host="0.0.0.0", once=False):
+        super().__init__(name)
+        self.host = host
+        self.port = port
+        self.once = once
+        self._running = False
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+        super().stop()
+
+    @property
+    def finished(self):
+        return not self._running
+
+    def _run(self):
+        try:
+            self._serve()
+        finally:
+            self._running = False
+            self.ring.close()
+
+    def _serve(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((self.host, self.port))
+            server.listen(1)
+            server.settimeout(0.5)
+            while self._running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    leftover = b""
+                    while self._running:
+                        data = conn.recv(8192)
+                        if not data:
+                            break
+                        data = leftover + data
+                        usable = len(data) - len(data) % 2
+                        leftover = data[usable:]
+                        self.ring.write_pcm16(data[:usable])
+                if self.once:
+                    return
+
+
+class SourceWorker:
+    """Reads one source's ring, segments it and submits speech to the scheduler."""
+
+    def __init__(self, source, scheduler, on_text, language=None, max_segment_s=15.0):
+        self.source = source
+        self.scheduler = scheduler
+        self.on_text = on_text
+        self.language = language
+        # Each room pins its own language when running in auto mode
+        self.language_policy = LanguagePolicy() if language is None else None
+        self.segmenter = VADSegmenter(rate=RATE, max_segment_s=max_segment_s)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._in_flight = []
+
+    def start(self):
+        self._thread.start()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        buffer = np.zeros(RATE * RING_SECONDS, dtype=np.float32)
+        block = int(RATE * BLOCK_SECONDS)
+        while True:
+            samples = self.source.ring.read_chunk(block, buffer, timeout=0.5)
+            if samples is None:
+                if self.source.finished:
+                    break
+                continue
+            for segment in self.segmenter.push(samples):
+                self._submit(segment)
+        last = self.segmenter.flush()
+        if last is not None:
+            self._submit(last)
+        for future in self._in_flight:
+            future.exception()  # wait for outstanding results before reporting done
+
+    def _submit(self, segment):
+        language = self.language
+        if self.language_policy is not None:
+            language = self.language_policy.language_for_chunk()
+        future = self.scheduler.submit(segment.audio, language=language)
+        start_s = segment.start / RATE
+
+        def done(f):
+            if f.exception() is not None:
+                self.on_text(self.source.name, start_s, f"[Transcription error: {f.exception()}]")
+                return
+            if self.language_policy is not None:
+                self.language_policy.observe(f.result(), language)
+            text = f.result()["text"].strip()
+            if text:
+                self.on_text(self.source.name, start_s, text)
+
+        future.add_done_callback(done)
+        self._in_flight = [f for f in self._in_flight if not f.done()] + [future]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe several audio sources with one shared Whisper model.")
+    parser.add_argument("--mic", type=int, action="append", default=[], help="PyAudio input device index")
+    parser.add_argument("--file", action="append", default=[], help="audio file replayed in real time")
+    parser.add_argument("--listen", type=int, action="append", default=[], help="TCP port for raw PCM")
+    parser.add_argument("--once", action="store_true",
+                        help="end each --listen source when its first client disconnects")
+    parser.add_argument("--speed", type=float, default=1.0, help="file replay speed (0 = as fast as possible)")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="auto", help="auto/cpu/cuda/cpu-int8")
+    parser.add_argument("--language", default="auto")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.1, help="seconds to wait for a batch to fill")
+    parser.add_argument("-o", "--output-dir", help="append each source's transcript to <dir>/<source>.txt")
+    args = parser.parse_args(argv)
+
+    sources = ([MicrophoneSource(f"mic{i}", i) for i in args.mic]
+               + [FileSource(os.path.splitext(os.path.basename(p))[0], p, args.speed) for p in args.file]
+               + [SocketSource(f"tcp{port}", port, once=args.once) for port in args.listen])
+    if not sources:
+        parser.error("give at least one --mic, --file or --listen source")
+
+    engine = TranscriptionEngine(args.model, args.device, log=lambda msg: print(msg, end=""))
+    engine.load()
+    scheduler = BatchScheduler(engine.model, max_batch=args.max_batch, max_wait=args.max_wait,
+                               fp16=engine.precision == "fp16").start()
+
+    lock = threading.Lock()
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    def on_text(name, start_s, text):
+        line = f"[{time.strftime('%H:%M:%S')}] [{name} +{start_s:.1f}s] {text}"
+        with lock:
+            print(line, flush=True)
+            if args.output_dir:
+                with open(os.path.join(args.output_dir, f"{name}.txt"), "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+    language = None if args.language == "auto" else args.language
+    workers = [SourceWorker(source, scheduler, on_text, language=language) for source in sources]
+    for source, worker in zip(sources, workers):
+        source.start()
+        worker.start()
+    print(f"[Transcribing {len(sources)} source(s): {', '.join(s.name for s in sources)} - Ctrl+C to stop]")
+
+    try:
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for source in sources:
+            source.stop()
+        # Workers flush their open VAD segment and wait for their results,
+        # which needs the scheduler still running
+        for worker in workers:
+            worker.join()
+        scheduler.stop()
+        for source in sources:
+            if getattr(source, "error", None) is not None:
+                print(f"[{source.name} failed: {source.error}]")
+        if scheduler.batches:
+            print(f"\n[{scheduler.segments} segment(s) in {scheduler.batches} batch(es), "
+                  f"avg batch {scheduler.segments / scheduler.batches:.1f}, "
+                  f"decoder busy {scheduler.busy_seconds:.1f}s]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
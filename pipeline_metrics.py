@@ -0,0 +1,249 @@
+"""Per-stage timing and gauges for the live pipeline.
+
+``PipelineMetrics`` accumulates wall and CPU time per stage (capture,
+VAD, mel/other, encoder, decoder, UI queue), keeps the latest value of
+gauges (queue depth, audio backlog, real-time factor) and counts
+temperature fallbacks. It can append one JSONL record per transcribed
+chunk and serve the totals as Prometheus text on a local port.
+
+When metrics are off, the pipeline holds ``NULL_METRICS`` instead: every
+method is a no-op and ``stage()`` hands back one shared null context, so
+the hot paths pay an attribute lookup and nothing else.
+"""
+import json
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("calls", "wall", "cpu", "last", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "wall", "cpu")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.wall, time.thread_time() - self.cpu)
+        return False
+
+
+class NullMetrics:
+    """Stand-in used when metrics are disabled."""
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def record(self, name, wall, cpu=0.0):
+        pass
+
+    def gauge(self, name, value):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def stage_wall(self, name):
+        return 0.0
+
+    def record_chunk(self, **fields):
+        pass
+
+    def readout(self):
+        return ""
+
+
+NULL_METRICS = NullMetrics()
+
+
+class PipelineMetrics:
+    """Thread-safe stage timers, gauges and counters."""
+
+    enabled = True
+
+    def __init__(self, jsonl_path=None):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._gauges = {}
+        self._counters = {}
+        self._last_chunk_wall = {}
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+        self._server = None
+
+    def stage(self, name):
+        """Context manager timing one pass through ``name``."""
+        return _Timer(self, name)
+
+    def record(self, name, wall, cpu=0.0):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = _Stage()
+            stage.calls += 1
+            stage.wall += wall
+            stage.cpu += cpu
+            stage.last = wall
+            stage.max = max(stage.max, wall)
+
+    def gauge(self, name, value):
+        self._gauges[name] = value
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def stage_wall(self, name):
+        with self._lock:
+            stage = self._stages.get(name)
+            return stage.wall if stage is not None else 0.0
+
+    def record_chunk(self, **fields):
+        """Write one JSONL record: ``fields``, the gauges, and the wall time
+        each stage spent since the previous record."""
+        if self._jsonl is None:
+            return
+        with self._lock:
+            deltas = {}
+            for name, stage in self._stages.items():
+                delta = stage.wall - self._last_chunk_wall.get(name, 0.0)
+                if delta > 0:
+                    deltas[name] = round(delta, 6)
+                self._last_chunk_wall[name] = stage.wall
+            record = dict(fields, time=time.time(), stages=deltas, gauges=dict(self._gauges),
+                          counters=dict(self._counters))
+        self._jsonl.write(json.dumps(record) + "\n")
+        self._jsonl.flush()
+
+    def readout(self):
+        """One-line summary for the GUI: average ms per stage plus gauges."""
+        with self._lock:
+            # The decoder runs once per generated token, so its average is per step
+            parts = [f"{'decoder/step' if name == 'decoder' else name} {1000 * s.wall / s.calls:.0f}ms"
+                     for name, s in self._stages.items() if s.calls]
+            gauges = dict(self._gauges)
+            fallbacks = self._counters.get("temperature_fallbacks", 0)
+        if "backlog_seconds" in gauges:
+            parts.append(f"backlog {gauges['backlog_seconds']:.1f}s")
+        if "rtf" in gauges:
+            parts.append(f"RTF {gauges['rtf']:.2f}")
+        if "queue_depth" in gauges:
+            parts.append(f"queue {gauges['queue_depth']}")
+        parts.append(f"fallbacks {fallbacks}")
+        return " | ".join(parts)
+
+    def prometheus_text(self):
+        with self._lock:
+            stages = {name: (s.calls, s.wall, s.cpu, s.max) for name, s in self._stages.items()}
+            gauges = dict(self._gauges)
+            counters = dict(self._counters)
+        lines = [
+            "# HELP transcriber_stage_seconds_total Wall time spent in each pipeline stage.",
+            "# TYPE transcriber_stage_seconds_total counter",
+        ]
+        lines += [f'transcriber_stage_seconds_total{{stage="{n}"}} {v[1]:.6f}' for n, v in stages.items()]
+        lines += ["# HELP transcriber_stage_cpu_seconds_total CPU time of the thread running each stage.",
+                  "# TYPE transcriber_stage_cpu_seconds_total counter"]
+        lines += [f'transcriber_stage_cpu_seconds_total{{stage="{n}"}} {v[2]:.6f}' for n, v in stages.items()]
+        lines += ["# HELP transcriber_stage_calls_total Passes through each pipeline stage.",
+                  "# TYPE transcriber_stage_calls_total counter"]
+        lines += [f'transcriber_stage_calls_total{{stage="{n}"}} {v[0]}' for n, v in stages.items()]
+        lines += ["# HELP transcriber_stage_max_seconds Longest single pass through each stage.",
+                  "# TYPE transcriber_stage_max_seconds gauge"]
+        lines += [f'transcriber_stage_max_seconds{{stage="{n}"}} {v[3]:.6f}' for n, v in stages.items()]
+        for name, value in gauges.items():
+            lines += [f"# TYPE transcriber_{name} gauge", f"transcriber_{name} {value}"]
+        for name, value in counters.items():
+            lines += [f"# TYPE transcriber_{name}_total counter", f"transcriber_{name}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve ``prometheus_text()`` at http://host:port/metrics on a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+
+class ModelStageTimer:
+    """Forward hooks timing a Whisper model's encoder and decoder passes.
+
+    Everything else inside ``transcribe`` (log-mel, language detection,
+    token bookkeeping) is what is left of the call's wall time.
+    """
+
+    def __init__(self, model, metrics):
+        self._handles = []
+        self._starts = threading.local()
+        for name in ("encoder", "decoder"):
+            module = getattr(model, name, None)
+            if module is None:
+                continue
+            self._handles.append(module.register_forward_pre_hook(self._pre_hook(name)))
+            self._handles.append(module.register_forward_hook(self._post_hook(name, metrics)))
+
+    def _pre_hook(self, name):
+        def hook(module, args):
+            setattr(self._starts, name, (time.perf_counter(), time.thread_time()))
+        return hook
+
+    def _post_hook(self, name, metrics):
+        def hook(module, args, output):
+            wall, cpu = getattr(self._starts, name)
+            metrics.record(name, time.perf_counter() - wall, time.thread_time() - cpu)
+        return hook
+
+    def remove(self):
+        for handle in self._handles:
+            handle.remove()
+        self._handles = []
+
+
+def temperature_fallbacks(result):
+    """Segments of a transcribe() result that needed a temperature above 0."""
+    return sum(1 for s in result.get("segments") or [] if s.get("temperature", 0.0) > 0)
@@ -0,0 +1,107 @@
+"""Int8 dynamic quantization of Whisper for CPU inference.
+
+``quantize_dynamic`` stores the weights of every Linear layer (attention
+projections and MLPs, which is where nearly all of Whisper's compute goes)
+as int8 and quantizes activations on the fly, so CPU decoding does roughly
+half the memory traffic of fp32. Convolutions, layer norms and the token
+embedding stay in fp32.
+
+Quantizing takes a few seconds for the larger models, so the quantized
+weights are saved next to Whisper's own downloads and reused on later
+loads. Only tensors are stored (a state dict plus the model dimensions),
+read back with ``weights_only=True`` like Whisper's own checkpoints: the
+cache directory is no more trusted than the downloads in it. On load an
+empty model is built from the dimensions and quantized, so its modules
+match the saved packed weights. The cache file name includes the source
+checkpoint's hash (``large`` is an alias that moves between releases) and
+the torch version, because the packed int8 format is not stable across
+releases.
+"""
+import hashlib
+import os
+
+import torch
+import whisper
+from torch import nn
+
+INT8 = "int8"
+
+
+def _ignore(message):
+    pass
+
+
+def checkpoint_id(size):
+    """Short identity of the checkpoint ``whisper.load_model(size)`` would load."""
+    if size in whisper._MODELS:
+        # Download URLs are .../<sha256 of the file>/<name>.pt
+        return whisper._MODELS[size].split("/")[-2][:12]
+    stat = os.stat(size)  # a checkpoint file path
+    key = f"{os.path.abspath(size)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+def cache_path(size, cache_dir=None):
+    if cache_dir is None:
+        default = os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(os.getenv("XDG_CACHE_HOME", default), "whisper")
+    version = torch.__version__.split("+")[0]
+    name = os.path.splitext(os.path.basename(size))[0]
+    return os.path.join(cache_dir, f"{name}-{checkpoint_id(size)}-int8-torch{version}.pt")
+
+
+def quantize_model(model):
+    """Quantize ``model``'s Linear layers to int8 in place and return it."""
+    model = model.cpu().float().eval()
+    for module in model.modules():
+        # whisper.model.Linear only overrides forward() to cast weights for
+        # fp16; quantize_dynamic matches on exact type, so present it as a
+        # plain nn.Linear
+        if isinstance(module, nn.Linear) and type(module) is not nn.Linear:
+            module.__class__ = nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_quantized_model(size, cache_dir=None, log=_ignore):
+    """Load the int8 CPU model for ``size``, quantizing and caching it on first use."""
+    path = cache_path(size, cache_dir)
+    if os.path.exists(path):
+        try:
+            checkpoint = torch.load(path, map_location="cpu", weights_only=True)
+            # Quantize an untrained skeleton so its modules take the packed weights
+            model = quantize_model(whisper.model.Whisper(whisper.model.ModelDimensions(**checkpoint["dims"])))
+            model.load_state_dict(checkpoint["model_state_dict"])
+            _set_alignment_heads(model, size)
+            log("[Loaded cached int8 model]\n")
+            return model
+        except Exception as e:
+            log(f"[Ignoring unreadable int8 cache {path}: {e}]\n")
+
+    model = quantize_model(whisper.load_model(size, device="cpu"))
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".part"
+        torch.save({"dims": vars(model.dims), "model_state_dict": model.state_dict()}, tmp)
+        os.replace(tmp, path)
+        log(f"[Cached int8 model at {path}]\n")
+    except OSError as e:
+        log(f"[Could not cache int8 model: {e}]\n")
+    return model
+
+
+def _set_alignment_heads(model, size):
+    # Not part of the state dict; whisper.load_model sets them per release
+    if size in whisper._ALIGNMENT_HEADS:
+        model.set_alignment_heads(whisper._ALIGNMENT_HEADS[size])
+
+
+def quantized_weight_bytes(model):
+    """Bytes held by packed int8 Linear weights (not reported by parameters())."""
+    total = 0
+    for module in model.modules():
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+            weight, bias = module._weight_bias()
+            total += weight.numel() * weight.element_size()
+            if bias is not None:
+                total += bias.numel() * bias.element_size()
+    return total
@@ -0,0 +1,266 @@
+"""Compressed archive of a listening session's audio, for re-transcription.
+
+Audio is normally discarded once a chunk has been transcribed. With the
+archive on, every sample the transcriber reads is also streamed to FLAC
+(lossless, about half the size of 16-bit WAV for speech) in rolling files
+of ``file_seconds`` each, so a crash loses at most the file being written.
+Alongside, ``segments.idx`` holds one fixed-size record per transcribed
+segment - its start and end sample in the session and the key of the
+transcript line it produced - and can be memory-mapped with numpy.
+
+Because every file holds exactly ``file_seconds`` of audio, a sample
+offset maps straight to a file and a position in it, and FLAC seeks
+within a file, so any time range is read without decoding the rest:
+
+    python session_archive.py extract archive/session-20240101-120000 --start 90 --end 120 -o clip.wav
+    python session_archive.py transcribe archive/session-20240101-120000 --start 90 --end 120 --model small
+    python session_archive.py reprocess archive/session-20240101-120000 --model medium
+
+``reprocess`` re-transcribes every segment at idle CPU priority and writes
+a new transcript (``retranscribed-<model>.jsonl``) next to the audio.
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+RATE = 16000
+SESSION_FILE = "session.json"
+SEGMENTS_FILE = "segments.idx"
+# Sample offsets into the session stream, the transcript line key (-1 when
+# the segment produced no line) and the wall-clock time it was indexed
+SEGMENT_DTYPE = np.dtype([("start", "<i8"), ("end", "<i8"), ("key", "<i8"), ("time", "<f8")])
+
+
+def _audio_name(i):
+    return f"audio-{i:04d}.flac"
+
+
+class SessionArchive:
+    """Writer: FLAC files plus the segment index, encoded on a background thread."""
+
+    def __init__(self, root="archive", rate=RATE, file_seconds=600, transcript=None):
+        import soundfile  # noqa: F401 (fail here, not on the writer thread)
+
+        self.rate = rate
+        self.file_samples = int(file_seconds * rate)
+        self.path = os.path.join(root, time.strftime("session-%Y%m%d-%H%M%S"))
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, SESSION_FILE), "w", encoding="utf-8") as f:
+            json.dump({"rate": rate, "file_samples": self.file_samples, "started": time.time(),
+                       "transcript": transcript}, f)
+        self._segments = open(os.path.join(self.path, SEGMENTS_FILE), "ab")
+        self.position = 0  # samples handed to write() so far
+        self._queue = queue.Queue()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, samples):
+        """Queue float32 samples for encoding; returns their start offset in the session."""
+        start = self.position
+        # The caller's buffer is reused for the next read
+        self._queue.put(np.array(samples, dtype=np.float32))
+        self.position += len(samples)
+        return start
+
+    def add_segment(self, start, end, key=-1):
+        record = np.array([(start, end, key, time.time())], dtype=SEGMENT_DTYPE)
+        self._segments.write(record.tobytes())
+        self._segments.flush()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._segments.close()
+
+    def _run(self):
+        import soundfile as sf
+
+        current, index, written = None, 0, 0
+        try:
+            while True:
+                samples = self._queue.get()
+                if samples is None:
+                    return
+                while len(samples):
+                    if current is None:
+                        current = sf.SoundFile(os.path.join(self.path, _audio_name(index)), "w", self.rate, 1,
+                                               format="FLAC", subtype="PCM_16")
+                    n = min(len(samples), self.file_samples - written)
+                    current.write(samples[:n])
+                    samples = samples[n:]
+                    written += n
+                    if written == self.file_samples:
+                        current.close()
+                        current, index, written = None, index + 1, 0
+        except Exception as e:
+            self.error = e
+            # Keep draining so write() never blocks the transcriber
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if current is not None:
+                current.close()
+
+
+class ArchiveReader:
+    """Random access to an archived session by sample range or segment."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, SESSION_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.rate = self.meta["rate"]
+        self.file_samples = self.meta["file_samples"]
+        segments_path = os.path.join(path, SEGMENTS_FILE)
+        size = os.path.getsize(segments_path) if os.path.exists(segments_path) else 0
+        count = size // SEGMENT_DTYPE.itemsize
+        self.segments = (np.memmap(segments_path, dtype=SEGMENT_DTYPE, mode="r", shape=(count,)) if count
+                         else np.zeros(0, dtype=SEGMENT_DTYPE))
+
+    @property
+    def duration(self):
+        """Seconds of audio in the archive's files."""
+        import soundfile as sf
+
+        total, i = 0, 0
+        while os.path.exists(os.path.join(self.path, _audio_name(i))):
+            total += sf.info(os.path.join(self.path, _audio_name(i))).frames
+            i += 1
+        return total / self.rate
+
+    def read(self, start, end):
+        """Samples ``start`` to ``end`` as float32, decoding only the files that hold them."""
+        import soundfile as sf
+
+        parts = []
+        position = start
+        while position < end:
+            i, offset = divmod(position, self.file_samples)
+            path = os.path.join(self.path, _audio_name(i))
+            if not os.path.exists(path):
+                break
+            n = min(end - position, self.file_samples - offset)
+            with sf.SoundFile(path) as f:
+                f.seek(offset)
+                data = f.read(n, dtype="float32")
+            if not len(data):
+                break
+            parts.append(data)
+            position += len(data)
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    def read_seconds(self, start, end):
+        return self.read(int(start * self.rate), int(end * self.rate))
+
+    def segments_between(self, start, end):
+        """Index records of segments overlapping samples ``start`` to ``end``."""
+        s = self.segments
+        return s[(s["end"] > start) & (s["start"] < end)]
+
+
+def idle_priority():
+    """Lower this process to idle CPU priority, where the OS supports it."""
+    if hasattr(os, "sched_setscheduler") and hasattr(os, "SCHED_IDLE"):
+        try:
+            os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+            return "SCHED_IDLE"
+        except OSError:
+            pass
+    if hasattr(os, "nice"):
+        os.nice(19)
+        return "nice 19"
+    try:
+        import psutil
+        psutil.Process().nice(psutil.IDLE_PRIORITY_CLASS)
+        return "idle priority class"
+    except (ImportError, AttributeError):
+        return None
+
+
+def reprocess(reader, engine, out_path, language="auto", log=print):
+    """Re-transcribe every indexed segment into a new TranscriptStore; returns the line count."""
+    from transcript_store import TranscriptStore
+
+    store = TranscriptStore(out_path)
+    lines = 0
+    try:
+        for i, segment in enumerate(reader.segments):
+            audio = reader.read(int(segment["start"]), int(segment["end"]))
+            if not len(audio):
+                continue
+            text = engine.transcribe(audio, language=language)["text"].strip()
+            if text:
+                start, end = segment["start"] / reader.rate, segment["end"] / reader.rate
+                store.append(f"[{start:8.1f}s] {text}\n", timestamp=float(segment["time"]),
+                             start=round(start, 2), end=round(end, 2), key=int(segment["key"]))
+                store.flush()
+                lines += 1
+            log(f"[{i + 1}/{len(reader.segments)}] {text}")
+    finally:
+        store.close()
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read, re-transcribe or reprocess an archived session.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("extract", "transcribe", "reprocess"):
+        p = sub.add_parser(name)
+        p.add_argument("session", help="archive/session-... directory")
+        if name != "reprocess":
+            p.add_argument("--start", type=float, default=0.0, help="seconds")
+            p.add_argument("--end", type=float, default=None, help="seconds (default: end of session)")
+        if name == "extract":
+            p.add_argument("-o", "--output", required=True, help="WAV/FLAC file to write")
+        else:
+            p.add_argument("--model", default="small")
+            p.add_argument("--device", default="auto", help="auto/cpu/cuda/cpu-int8")
+            p.add_argument("--language", default="auto")
+        if name == "reprocess":
+            p.add_argument("--threads", type=int, default=None, help="torch CPU threads")
+    args = parser.parse_args(argv)
+
+    reader = ArchiveReader(args.session)
+    if args.command in ("extract", "transcribe"):
+        end = args.end if args.end is not None else reader.duration
+        audio = reader.read_seconds(args.start, end)
+        if args.command == "extract":
+            import soundfile as sf
+            sf.write(args.output, audio, reader.rate)
+            print(f"Wrote {len(audio) / reader.rate:.1f}s to {args.output}")
+            return 0
+
+    from transcription_engine import TranscriptionEngine
+    log = lambda msg: print(msg, end="", flush=True)
+    engine = TranscriptionEngine(args.model, args.device, log=log)
+    if args.command == "transcribe":
+        engine.load()
+        print(engine.transcribe(audio, language=args.language)["text"].strip())
+        return 0
+
+    # A whole session can take a while; keep out of the way of live work
+    priority = idle_priority()
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+    engine.load()
+    out_path = os.path.join(args.session, f"retranscribed-{args.model}.jsonl")
+    for stale in (out_path, out_path + ".idx"):
+        if os.path.exists(stale):
+            os.remove(stale)
+    print(f"Re-transcribing {len(reader.segments)} segment(s) with {args.model}"
+          f"{f' at {priority}' if priority else ''} -> {out_path}")
+    lines = reprocess(reader, engine, out_path, language=args.language)
+    print(f"Done: {lines} line(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
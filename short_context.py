@@ -0,0 +1,102 @@
+"""Reduced encoder context ("audio_ctx") for short chunks.
+
+``model.transcribe`` always pads audio to a 30 s log-mel window, so the
+encoder processes 1500 frames even for a 5 s chunk that only fills ~250 of
+them. Like whisper.cpp's ``audio_ctx`` option, ``transcribe_short`` runs
+the encoder only over the frames that cover the chunk (plus a margin),
+truncating the positional embedding to match, and decodes from those
+features.
+
+The trade-off is accuracy: the model was trained on full 30 s windows, and
+very small contexts start to hallucinate or drop words. Use
+``benchmarks/audio_ctx_bench.py`` to choose ``min_audio_ctx`` for the chunk
+lengths you use.
+"""
+import dataclasses
+import math
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import whisper
+from whisper.audio import HOP_LENGTH, N_SAMPLES, log_mel_spectrogram, pad_or_trim
+
+from decoding import decoding_options, decoding_to_transcript, needs_fallback
+
+# Encoder frames are 2 mel frames (20 ms) each; round contexts up to this
+# multiple so a handful of distinct shapes are reused
+AUDIO_CTX_STEP = 64
+DEFAULT_MIN_AUDIO_CTX = 384
+DEFAULT_MARGIN_CTX = 64
+
+# Swapping the positional embedding mutates the model, so short-context
+# decodes of a model must not overlap with any other use of it
+_ctx_lock = threading.Lock()
+
+
+def audio_ctx_for(n_samples, min_audio_ctx=DEFAULT_MIN_AUDIO_CTX, margin=DEFAULT_MARGIN_CTX, max_ctx=1500):
+    """Number of encoder frames needed to cover ``n_samples`` of audio."""
+    frames = math.ceil(n_samples / HOP_LENGTH / 2) + margin
+    ctx = math.ceil(frames / AUDIO_CTX_STEP) * AUDIO_CTX_STEP
+    return int(min(max(ctx, min_audio_ctx), max_ctx))
+
+
+@contextmanager
+def reduced_audio_ctx(model, n_ctx):
+    """Temporarily run ``model``'s encoder over ``n_ctx`` frames instead of 1500."""
+    with _ctx_lock:
+        encoder = model.encoder
+        full_embedding = encoder.positional_embedding
+        full_dims = model.dims
+        if n_ctx >= full_dims.n_audio_ctx:
+            yield model
+            return
+        try:
+            encoder.positional_embedding = full_embedding[:n_ctx]
+            # decode()/detect_language() recognise already-encoded features by
+            # comparing against dims.n_audio_ctx
+            model.dims = dataclasses.replace(full_dims, n_audio_ctx=n_ctx)
+            yield model
+        finally:
+            encoder.positional_embedding = full_embedding
+            model.dims = full_dims
+
+
+def transcribe_short(model, audio, language=None, audio_ctx=None, min_audio_ctx=DEFAULT_MIN_AUDIO_CTX,
+                     temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0), compression_ratio_threshold=2.4,
+                     logprob_threshold=-1.0, no_speech_threshold=0.6, initial_prompt=None,
+                     fp16=False, condition_on_previous_text=True, **decode_options):
+    """Transcribe a chunk of up to 30 s with a reduced encoder context.
+
+    Returns a dict shaped like ``model.transcribe``'s result (``text``,
+    ``language``, one entry in ``segments``) so callers can switch freely.
+    Longer audio falls back to ``model.transcribe``.
+    ``condition_on_previous_text`` only matters there: a single window has
+    no previous text.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if len(audio) > N_SAMPLES:
+        return model.transcribe(audio, language=language, temperature=temperature, fp16=fp16,
+                                initial_prompt=initial_prompt,
+                                condition_on_previous_text=condition_on_previous_text, **decode_options)
+
+    n_ctx = audio_ctx or audio_ctx_for(len(audio), min_audio_ctx)
+    n_frames = 2 * n_ctx
+    # Pad with zero samples (not zero mel values) so the log-mel floor matches
+    # what transcribe() sees with its 30 s padding
+    mel = log_mel_spectrogram(audio, model.dims.n_mels, padding=max(0, n_frames * HOP_LENGTH - len(audio)))
+    mel = pad_or_trim(mel, n_frames).to(model.device)
+
+    if isinstance(temperature, (int, float)):
+        temperature = (temperature,)
+
+    result = None
+    with reduced_audio_ctx(model, n_ctx):
+        for t in temperature:
+            result = whisper.decode(model, mel, decoding_options(t, language=language, prompt=initial_prompt,
+                                                                 fp16=fp16, **decode_options))
+
+            if not needs_fallback(result, compression_ratio_threshold, logprob_threshold, no_speech_threshold):
+                break
+
+    return decoding_to_transcript(result, len(audio), logprob_threshold, no_speech_threshold, audio_ctx=n_ctx)
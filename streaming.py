@@ -0,0 +1,167 @@
+"""Low-latency streaming transcription with local prefix agreement.
+
+Instead of decoding each chunk once, the audio that has not been
+committed yet is re-decoded every ``step_seconds`` as it grows. Words are
+committed only once two consecutive hypotheses agree on them; the rest of
+the latest hypothesis is shown as a replaceable partial. Committed text is
+passed back as ``initial_prompt`` so context carries across the window,
+and the audio buffer is trimmed past the last committed word so each
+decode stays short.
+"""
+import re
+
+import numpy as np
+
+RATE = 16000
+
+
+def _normalize(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class LocalAgreement:
+    """Commits the longest common word prefix of consecutive hypotheses."""
+
+    def __init__(self):
+        self.committed = []     # (start, end, word) in absolute seconds
+        self._previous = []     # last hypothesis beyond the committed point
+
+    @property
+    def committed_until(self):
+        return self.committed[-1][1] if self.committed else 0.0
+
+    def update(self, words):
+        """Feed a new hypothesis; returns (newly committed words, partial words)."""
+        # Ignore words that lie before what is already committed
+        cutoff = self.committed_until - 0.1
+        words = [w for w in words if w[0] > cutoff]
+        words = self._strip_repeated_prefix(words)
+
+        agreed = []
+        for prev, cur in zip(self._previous, words):
+            if _normalize(prev[2]) != _normalize(cur[2]):
+                break
+            agreed.append(cur)
+        self.committed.extend(agreed)
+        self._previous = words[len(agreed):]
+        return agreed, self._previous
+
+    def commit_all(self):
+        """Commit the remaining hypothesis (end of stream / forced trim)."""
+        remaining = self._previous
+        self.committed.extend(remaining)
+        self._previous = []
+        return remaining
+
+    def _strip_repeated_prefix(self, words):
+        # Whisper often repeats the last committed words at the start of a
+        # new window; drop up to a 5-gram overlap
+        if not self.committed or not words:
+            return words
+        tail = [_normalize(w[2]) for w in self.committed[-5:]]
+        head = [_normalize(w[2]) for w in words[:5]]
+        for n in range(min(len(tail), len(head)), 0, -1):
+            if tail[-n:] == head[:n]:
+                return words[n:]
+        return words
+
+
+class StreamingTranscriber:
+    """Re-decodes a growing window and reports committed + partial text."""
+
+    def __init__(self, model, language=None, step_seconds=0.5, max_buffer_seconds=15.0,
+                 prompt_chars=200, transcribe_options=None):
+        self.model = model
+        self.language = language
+        self.step_seconds = step_seconds
+        self.max_buffer_seconds = max_buffer_seconds
+        self.prompt_chars = prompt_chars
+        self.transcribe_options = dict(transcribe_options or {})
+        self.agreement = LocalAgreement()
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._offset = 0.0          # absolute time of _audio[0]
+        self._decoded_samples = 0   # buffer length at the last decode
+        self.detected_language = None
+
+    @property
+    def buffered_seconds(self):
+        return len(self._audio) / RATE
+
+    def insert_audio(self, samples):
+        self._audio = np.concatenate((self._audio, samples))
+
+    def ready(self):
+        """True when enough new audio arrived since the last decode."""
+        return len(self._audio) - self._decoded_samples >= self.step_seconds * RATE
+
+    def process(self):
+        """Decode the current window; returns (committed_text, partial_text)."""
+        if not len(self._audio):
+            return "", ""
+        self._decoded_samples = len(self._audio)
+        words = self._transcribe_words()
+        committed, partial = self.agreement.update(words)
+
+        if self.buffered_seconds > self.max_buffer_seconds:
+            # Nothing stable for too long: commit what we have and start over
+            committed = committed + self.agreement.commit_all()
+            partial = []
+        self._trim()
+        return _join(committed), _join(partial)
+
+    def finish(self):
+        """Decode whatever is left and commit it all."""
+        committed = []
+        if len(self._audio) > self._decoded_samples:
+            words = self._transcribe_words()
+            committed, _ = self.agreement.update(words)
+        committed = committed + self.agreement.commit_all()
+        self._offset += len(self._audio) / RATE
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._decoded_samples = 0
+        return _join(committed)
+
+    def drop_audio(self, keep_seconds=0.0):
+        """Discard buffered audio (e.g. silence) except the last ``keep_seconds``."""
+        keep = int(keep_seconds * RATE)
+        cut = len(self._audio) - keep
+        if cut > 0:
+            self._audio = self._audio[cut:]
+            self._offset += cut / RATE
+            self._decoded_samples = max(0, self._decoded_samples - cut)
+
+    def _prompt(self):
+        text = _join(self.agreement.committed[-50:])
+        return text[-self.prompt_chars:] if text else None
+
+    def _transcribe_words(self):
+        result = self.model.transcribe(self._audio,
+                                       language=self.language,
+                                       initial_prompt=self._prompt(),
+                                       word_timestamps=True,
+                                       condition_on_previous_text=False,
+                                       **self.transcribe_options)
+        self.detected_language = result.get("language", self.detected_language)
+        words = []
+        for segment in result.get("segments", []):
+            for w in segment.get("words", []):
+                words.append((w["start"] + self._offset, w["end"] + self._offset, w["word"]))
+        return words
+
+    def _trim(self):
+        # Drop audio that ends before the last committed word, and never keep
+        # more than max_buffer_seconds: with nothing committed (silence, noise)
+        # the window would otherwise grow and every step re-decode all of it
+        keep_from = max(self.agreement.committed_until,
+                        self._offset + self.buffered_seconds - self.max_buffer_seconds)
+        cut = int(round((keep_from - self._offset) * RATE))
+        if cut <= 0:
+            return
+        cut = min(cut, len(self._audio))
+        self._audio = self._audio[cut:]
+        self._offset += cut / RATE
+        self._decoded_samples = max(0, self._decoded_samples - cut)
+
+
+def _join(words):
+    return "".join(w[2] for w in words).strip()
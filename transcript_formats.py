@@ -0,0 +1,54 @@
+"""Writers for transcription results: JSONL segments, SRT and WebVTT."""
+import json
+
+
+def format_timestamp(seconds, decimal_marker="."):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def _segments(result):
+    for segment in result.get("segments", []):
+        text = segment["text"].strip()
+        if text:
+            yield segment, text
+
+
+def write_jsonl(result, f, source=None):
+    """One JSON object per segment, with the decoder's confidence fields."""
+    for segment, text in _segments(result):
+        record = {
+            "source": source,
+            "start": round(segment["start"], 3),
+            "end": round(segment["end"], 3),
+            "text": text,
+            "language": result.get("language"),
+            "avg_logprob": segment.get("avg_logprob"),
+            "no_speech_prob": segment.get("no_speech_prob"),
+            "compression_ratio": segment.get("compression_ratio"),
+        }
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def write_srt(result, f, source=None):
+    for i, (segment, text) in enumerate(_segments(result), 1):
+        f.write(f"{i}\n"
+                f"{format_timestamp(segment['start'], ',')} --> {format_timestamp(segment['end'], ',')}\n"
+                f"{text}\n\n")
+
+
+def write_vtt(result, f, source=None):
+    f.write("WEBVTT\n\n")
+    for segment, text in _segments(result):
+        f.write(f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n"
+                f"{text}\n\n")
+
+
+WRITERS = {
+    "jsonl": write_jsonl,
+    "srt": write_srt,
+    "vtt": write_vtt,
+}
@@ -0,0 +1,137 @@
+"""Append-only on-disk transcript log with a timestamp/offset index.
+
+Every finished line of a session is appended to ``<name>.jsonl`` as one
+JSON record, and a fixed-size entry (time, byte offset) is appended to
+``<name>.jsonl.idx``. Record ``i`` can then be read with one seek into
+the index and one into the log, so the GUI only has to keep the lines it
+is showing in memory, however long the session runs.
+
+``replace`` revises a record without rewriting the log: the new version
+is appended with a ``replaces`` field and the record's index entry is
+pointed at it, so readers only ever see the latest text.
+"""
+import json
+import os
+import struct
+import time
+from bisect import bisect_left
+
+# float64 unix time, uint64 byte offset into the log
+_INDEX_ENTRY = struct.Struct("<dQ")
+
+
+class TranscriptStore:
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._log = open(path, "ab+")
+        # Not append mode: replace() rewrites entries in place
+        self._index = open(self.index_path, "r+b" if os.path.exists(self.index_path) else "w+b")
+        self._count = os.fstat(self._index.fileno()).st_size // _INDEX_ENTRY.size
+        self._check_index()
+
+    def _check_index(self):
+        # A crash between the two appends can leave the index one entry
+        # short (or ragged); rebuild it from the log, which is the source
+        # of truth
+        log_size = os.fstat(self._log.fileno()).st_size
+        index_size = os.fstat(self._index.fileno()).st_size
+        if index_size % _INDEX_ENTRY.size == 0:
+            # The newest record is the one at the highest offset (with
+            # revisions that need not be the last entry)
+            self._index.seek(0)
+            offsets = [offset for _, offset in _INDEX_ENTRY.iter_unpack(self._index.read())]
+            last_end = self._record_end_at(max(offsets)) if offsets else 0
+            if last_end == log_size:
+                return
+        entries = []
+        self._log.seek(0)
+        offset = 0
+        for line in self._log:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if "replaces" in record and record["replaces"] < len(entries):
+                entries[record["replaces"]] = (record.get("time", 0.0), offset)
+            else:
+                entries.append((record.get("time", 0.0), offset))
+            offset += len(line)
+        self._log.truncate(offset)
+        self._index.truncate(0)
+        self._index.seek(0)
+        self._index.write(b"".join(_INDEX_ENTRY.pack(*entry) for entry in entries))
+        self._count = len(entries)
+        self._index.flush()
+
+    def _record_end_at(self, offset):
+        self._log.seek(offset)
+        return offset + len(self._log.readline())
+
+    def __len__(self):
+        return self._count
+
+    def append(self, text, kind="line", timestamp=None, **fields):
+        """Append one record and return its index. Call ``flush`` to persist."""
+        record = dict(fields, time=timestamp if timestamp is not None else time.time(), kind=kind, text=text)
+        data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self._log.seek(0, os.SEEK_END)
+        offset = self._log.tell()
+        self._log.write(data)
+        self._index.seek(0, os.SEEK_END)
+        self._index.write(_INDEX_ENTRY.pack(record["time"], offset))
+        self._count += 1
+        return self._count - 1
+
+    def replace(self, i, text, **fields):
+        """Replace record ``i``'s text (keeping its time and kind). Call ``flush`` to persist."""
+        old = self.read(i, i + 1)[0]
+        record = dict(old, **fields, text=text, replaces=i)
+        data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self._log.seek(0, os.SEEK_END)
+        offset = self._log.tell()
+        self._log.write(data)
+        self._index.seek(i * _INDEX_ENTRY.size)
+        self._index.write(_INDEX_ENTRY.pack(record["time"], offset))
+
+    def flush(self):
+        self._log.flush()
+        self._index.flush()
+
+    def _entry(self, i):
+        self._index.seek(i * _INDEX_ENTRY.size)
+        return _INDEX_ENTRY.unpack(self._index.read(_INDEX_ENTRY.size))
+
+    def read(self, start, stop):
+        """Records ``start`` to ``stop`` (exclusive) as dicts."""
+        start, stop = max(start, 0), min(stop, self._count)
+        if start >= stop:
+            return []
+        self.flush()
+        self._index.seek(start * _INDEX_ENTRY.size)
+        entries = _INDEX_ENTRY.iter_unpack(self._index.read((stop - start) * _INDEX_ENTRY.size))
+        records = []
+        for _, offset in entries:
+            # Consecutive records are usually adjacent; revised ones are not
+            if self._log.tell() != offset:
+                self._log.seek(offset)
+            records.append(json.loads(self._log.readline()))
+        return records
+
+    def index_at(self, timestamp):
+        """Index of the first record at or after ``timestamp``."""
+        store = self
+
+        class Times:
+            def __len__(self):
+                return store._count
+
+            def __getitem__(self, i):
+                return store._entry(i)[0]
+
+        return bisect_left(Times(), timestamp)
+
+    def close(self):
+        self._log.close()
+        self._index.close()
@@ -0,0 +1,199 @@
+"""Bounded view of a session transcript in a Tk Text widget.
+
+Finished lines go to a TranscriptStore on disk and only the most recent
+``max_lines`` of them stay in the widget, so inserts cost the same after
+eight hours as after eight minutes. Scrolling to the top of the widget
+pages older lines in from the store (and drops the newest ones); scrolling
+back down pages forward again until the view is following the live tail.
+
+The live caption line (committed words plus a gray partial guess) is drawn
+after the last finished line, at the ``tail`` mark, and redrawn as a unit.
+
+A finished line can be given a key and later replaced in place (the
+confidence cascade swaps a provisional line for a better decode), in the
+store and - if it is on screen - in the widget.
+"""
+import os
+import time
+from collections import deque
+from itertools import islice
+
+from transcript_store import TranscriptStore
+
+
+class TranscriptView:
+    def __init__(self, text, store_dir="transcripts", max_lines=1000, page_lines=200):
+        self.text = text
+        self.store_dir = store_dir
+        self.path = os.path.join(store_dir, time.strftime("session-%Y%m%d-%H%M%S.jsonl"))
+        self.max_lines = max_lines
+        self.page_lines = page_lines
+        self._store = None
+        # Newline count of each store record shown, oldest first
+        self._shown = deque()
+        self._first = 0  # store index of the first record shown
+        self._floor = 0  # no paging above this record (set by clear())
+        self._caption = None
+        self._partial = ""
+        self._page_pending = False
+        # Line key -> store index, for lines that may still be replaced
+        self._keys = {}
+
+        text.mark_set("tail", "1.0")
+        text.mark_gravity("tail", "left")
+        self._scroll_set = text.vbar.set if hasattr(text, "vbar") else None
+        text.configure(yscrollcommand=self._on_scroll)
+
+    @property
+    def store(self):
+        # Created on the first line, so opening and closing the app leaves no empty files
+        if self._store is None:
+            self._store = TranscriptStore(self.path)
+        return self._store
+
+    @property
+    def following(self):
+        """True when the last stored line is in the widget (new lines are shown)."""
+        stored = len(self._store) if self._store is not None else 0
+        return self._first + len(self._shown) >= stored
+
+    def update(self, lines=(), caption=None, partial="", caption_changed=False):
+        """Store finished ``lines`` and redraw the tail in one go.
+
+        ``lines`` are (kind, text) pairs, or (kind, text, key) for a line
+        that ``replace`` may revise later (the key is stored with it).
+        """
+        lines = [(kind, text if text.endswith("\n") else text + "\n", *key) for kind, text, *key in lines]
+        following = self.following
+        for kind, text, *key in lines:
+            if key:
+                self._keys[key[0]] = self.store.append(text, kind=kind, key=key[0])
+            else:
+                self.store.append(text, kind=kind)
+        # Only lines still near the live tail are worth revising
+        while len(self._keys) > self.max_lines:
+            del self._keys[next(iter(self._keys))]
+        if lines:
+            self.store.flush()
+        self._caption, self._partial = caption, partial
+        if not following:
+            return  # the user is reading history; the lines are in the store
+
+        if lines or caption_changed:
+            self.text.delete("tail", "end-1c")
+        if lines:
+            self._insert_at_tail("".join(line[1] for line in lines))
+            self._shown.extend(line[1].count("\n") for line in lines)
+            self._trim_top()
+        if lines or caption_changed:
+            self._draw_caption()
+        self.text.see("end")
+
+    def replace(self, key, text):
+        """Swap the text of the line stored under ``key``; False if unknown."""
+        index = self._keys.pop(key, None)
+        if index is None:
+            return False
+        text = text if text.endswith("\n") else text + "\n"
+        self.store.replace(index, text)
+        self.store.flush()
+        if self._first <= index < self._first + len(self._shown):
+            offset = index - self._first
+            start = 1 + sum(islice(self._shown, offset))
+            self.text.delete(f"{start}.0", f"{start + self._shown[offset]}.0")
+            # The line ends right before "tail" when it is the newest one
+            self.text.mark_gravity("tail", "right")
+            self.text.insert(f"{start}.0", text)
+            self.text.mark_gravity("tail", "left")
+            self._shown[offset] = text.count("\n")
+        return True
+
+    def clear(self):
+        """Empty the widget; earlier lines stay in the session file only."""
+        self.text.delete("1.0", "end")
+        self.text.mark_set("tail", "1.0")
+        self._shown.clear()
+        self._first = self._floor = len(self._store) if self._store is not None else 0
+        self._caption, self._partial = None, ""
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+
+    def _insert_at_tail(self, chars):
+        self.text.mark_gravity("tail", "right")
+        self.text.insert("tail", chars)
+        self.text.mark_gravity("tail", "left")
+
+    def _draw_caption(self):
+        if self._caption is not None:
+            partial = " " + self._partial if self._partial else ""
+            self.text.insert("tail", self._caption, (), partial, ("partial",))
+
+    def _trim_top(self):
+        lines = 0
+        while len(self._shown) > self.max_lines:
+            lines += self._shown.popleft()
+            self._first += 1
+        if lines:
+            self.text.delete("1.0", f"{lines + 1}.0")
+        return lines
+
+    def _trim_bottom(self):
+        lines = 0
+        while len(self._shown) > self.max_lines:
+            lines += self._shown.pop()
+        if lines:
+            # Records end with a newline, so "tail" sits at the start of a line
+            self.text.delete(f"tail - {lines} lines", "end-1c")
+
+    def _on_scroll(self, first, last):
+        if self._scroll_set is not None:
+            self._scroll_set(first, last)
+        if self._page_pending:
+            return
+        if float(first) <= 0.0 and self._first > self._floor:
+            self._page_pending = True
+            self.text.after_idle(self._page_older)
+        elif float(last) >= 1.0 and not self.following:
+            self._page_pending = True
+            self.text.after_idle(self._page_newer)
+
+    def _page_older(self):
+        try:
+            start = max(self._first - self.page_lines, self._floor)
+            records = self.store.read(start, self._first)
+            if not records:
+                return
+            top = int(self.text.index("@0,0").split(".")[0])
+            chars = "".join(r["text"] for r in records)
+            # Right gravity keeps "tail" after the new lines even when the
+            # widget holds no finished lines yet
+            self.text.mark_gravity("tail", "right")
+            self.text.insert("1.0", chars)
+            self.text.mark_gravity("tail", "left")
+            self._shown.extendleft(reversed([r["text"].count("\n") for r in records]))
+            self._first = start
+            # Reading history: the caption and the newest lines make way
+            self.text.delete("tail", "end-1c")
+            self._trim_bottom()
+            if self.following:
+                self._draw_caption()
+            self.text.yview(f"{top + chars.count(chr(10))}.0")
+        finally:
+            self._page_pending = False
+
+    def _page_newer(self):
+        try:
+            end = self._first + len(self._shown)
+            records = self.store.read(end, end + self.page_lines)
+            top = int(self.text.index("@0,0").split(".")[0])
+            if records:
+                self._insert_at_tail("".join(r["text"] for r in records))
+                self._shown.extend(r["text"].count("\n") for r in records)
+            removed = self._trim_top()
+            if self.following:
+                self._draw_caption()
+            self.text.yview(f"{max(top - removed, 1)}.0")
+        finally:
+            self._page_pending = False
@@ -0,0 +1,128 @@
+"""Headless Whisper engine: device selection, model loading, audio loading
+and transcription, shared by the Tk app and the command-line tools.
+
+Nothing in here touches Tk, so it can run on servers without a display.
+torch and whisper are imported on first use, so importing this module
+(e.g. for the combobox choices) does not slow down GUI startup.
+"""
+import numpy as np
+
+from model_registry import ModelRegistry
+
+SAMPLE_RATE = 16000
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large"]
+DEVICE_CHOICES = ["auto", "cpu", "cuda", "cpu-int8"]
+
+
+def _ignore(message):
+    pass
+
+
+def resolve_device(choice, log=_ignore):
+    """Map a Device combobox choice ("auto"/"cpu"/"cuda"/"cpu-int8") to a torch device."""
+    import torch
+
+    if choice == "cpu-int8":
+        log("[Using device: CPU with int8 quantized weights]\n")
+        return "cpu"
+    if choice == "auto":
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        log(f"[Auto-selected device: {device.upper()}]\n")
+    else:
+        device = choice
+        log(f"[Using device: {device.upper()}]\n")
+
+    if device == "cpu":
+        log("[Running on CPU - will be slower]\n")
+    elif torch.cuda.is_available():
+        log(f"[GPU detected: {torch.cuda.get_device_name(0)}]\n")
+        log("[Using GPU - will be fast!]\n")
+    else:
+        log("[WARNING: CUDA selected but not available, falling back to CPU]\n")
+        device = "cpu"
+    return device
+
+
+def load_audio_file(path, rate=SAMPLE_RATE):
+    """Read an audio file as mono float32 at ``rate`` Hz.
+
+    soundfile handles WAV/FLAC/OGG (and MP3 with recent libsndfile) without
+    ffmpeg; anything else goes through Whisper's ffmpeg-based loader.
+    """
+    try:
+        import soundfile as sf
+        audio, sample_rate = sf.read(path, dtype="float32", always_2d=True)
+    except Exception:
+        import whisper
+        return whisper.load_audio(path, sr=rate)
+
+    audio = audio.mean(axis=1)
+    if sample_rate != rate:
+        from scipy import signal
+        g = np.gcd(int(sample_rate), rate)
+        audio = signal.resample_poly(audio, rate // g, int(sample_rate) // g)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+class TranscriptionEngine:
+    """Holds one Whisper model (from a ModelRegistry) and the options used to run it."""
+
+    def __init__(self, model_size="base", device="auto", log=_ignore, registry=None, precision="fp32"):
+        self.model_size = model_size
+        self.device_choice = device
+        # cpu-int8 is a CPU device with quantized weights
+        self.precision = "int8" if device == "cpu-int8" else precision
+        self.device = None
+        self.model = None
+        self.model_entry = None
+        self.log = log
+        self.registry = registry if registry is not None else ModelRegistry(log=log)
+        # Optional LanguagePolicy used when language is "auto"
+        self.language_policy = None
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    def load(self):
+        self.device = resolve_device(self.device_choice, self.log)
+        key = self.registry.make_key(self.model_size, self.device, self.precision)
+        if key in self.registry.cached_keys():
+            self.log("[Using cached model]\n")
+        else:
+            self.log("[Downloading/Loading model...]\n")
+        self.model_entry = self.registry.get_entry(*key)
+        self.model = self.model_entry.model
+        return self.model
+
+    def transcribe(self, audio, language="auto", short_context=False,
+                   min_audio_ctx=None, **options):
+        """Transcribe float32 16 kHz audio.
+
+        ``language="auto"`` detects the language, or - with a
+        ``language_policy`` set - uses the language pinned for the session.
+        """
+        if self.model is None:
+            raise RuntimeError("Model is not loaded")
+        language = None if language in (None, "auto") else language
+        policy = self.language_policy if language is None else None
+        if policy is not None:
+            language = policy.language_for_chunk()
+        options.setdefault("fp16", self.precision == "fp16")
+        if short_context:
+            from short_context import DEFAULT_MIN_AUDIO_CTX, transcribe_short
+            # Falls back to model.transcribe for audio longer than 30 s
+            if min_audio_ctx is None:
+                min_audio_ctx = DEFAULT_MIN_AUDIO_CTX
+            result = transcribe_short(self.model, audio, language=language,
+                                      min_audio_ctx=min_audio_ctx, **options)
+        else:
+            result = self.model.transcribe(audio, language=language, **options)
+        if policy is not None:
+            policy.observe(result, language)
+        return result
+
+    def transcribe_file(self, path, language="auto", **options):
+        """Load and transcribe a whole file; returns (result, audio_seconds)."""
+        audio = load_audio_file(path)
+        return self.transcribe(audio, language=language, **options), len(audio) / SAMPLE_RATE
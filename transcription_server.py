@@ -0,0 +1,357 @@
+"""Streaming transcription server: WebSocket PCM in, JSON transcripts out.
+
+One process hosts the model(s); any number of clients connect:
+
+- ``GET /stream`` (WebSocket): send 16 kHz mono int16 little-endian PCM as
+  binary messages, optionally preceded by a text message
+  ``{"language": "en"}``. The server cuts speech segments with a VAD and
+  answers with ``{"type": "partial", ...}`` while a segment is open and
+  ``{"type": "final", "start", "end", "text", "language"}`` once it is
+  decoded. Send ``{"type": "eof"}`` to flush; the server replies
+  ``{"type": "done"}``.
+- ``POST /transcribe`` with an audio file as the body (any format
+  soundfile/ffmpeg reads; ``?format=pcm16`` for raw 16 kHz PCM) returns the
+  whole transcript.
+- ``GET /health`` reports load.
+
+All decoding goes through BatchScheduler, so segments from concurrent
+streams and files are decoded together. ``--replicas`` runs several model
+copies, each with its own scheduler thread. Admission control refuses new
+streams/files beyond ``--max-streams`` or when the decode queue is too
+deep. Each stream is read only as fast as its segments are decoded, so
+TCP flow control pushes back on clients that send faster than real time.
+
+Needs aiohttp (``pip install aiohttp``).
+
+    python transcription_server.py --model small --port 8765 --replicas 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from batch_scheduler import BatchScheduler
+from language_policy import LanguagePolicy
+from model_registry import ModelRegistry
+from transcription_engine import TranscriptionEngine, load_audio_file
+from vad import VADSegmenter, segment_audio
+
+try:
+    from aiohttp import WSMsgType, web
+except ImportError:  # optional dependency, only the server needs it
+    web = None
+
+RATE = 16000
+MAX_SEGMENT_SECONDS = 15
+# Closing code for "try again later" (RFC 6455 registry)
+WS_TRY_AGAIN_LATER = 1013
+
+
+class SchedulerPool:
+    """One BatchScheduler per model replica; submits go to the least loaded."""
+
+    def __init__(self, schedulers):
+        self.schedulers = schedulers
+
+    @property
+    def pending(self):
+        return sum(s.pending for s in self.schedulers)
+
+    def submit(self, audio, language=None):
+        """Raises queue.Full when every replica's queue is full."""
+        for scheduler in sorted(self.schedulers, key=lambda s: s.pending):
+            try:
+                return scheduler.submit(audio, language=language, block=False)
+            except queue.Full:
+                continue
+        raise queue.Full
+
+    def stop(self):
+        for scheduler in self.schedulers:
+            scheduler.stop()
+
+    def stats(self):
+        return {
+            "batches": sum(s.batches for s in self.schedulers),
+            "segments": sum(s.segments for s in self.schedulers),
+            "fallback_decodes": sum(s.fallback_decodes for s in self.schedulers),
+            "busy_seconds": round(sum(s.busy_seconds for s in self.schedulers), 3),
+        }
+
+
+class TranscriptionServer:
+    def __init__(self, pool, max_streams=32, max_pending=64, partial_every=1.0, stream_inflight=4):
+        self.pool = pool
+        self.max_streams = max_streams
+        # Past this many queued segments new work is refused and partials skipped
+        self.max_pending = max_pending
+        self.partial_every = partial_every
+        self.stream_inflight = stream_inflight
+        self.streams = 0
+        self.rejected = 0
+        self.started = time.time()
+
+    def overloaded(self):
+        return self.pool.pending >= self.max_pending
+
+    async def submit(self, audio, language):
+        """Queue a segment, waiting (not failing) while the schedulers are full."""
+        while True:
+            try:
+                return asyncio.wrap_future(self.pool.submit(audio, language=language))
+            except queue.Full:
+                await asyncio.sleep(0.05)
+
+    async def health(self, request):
+        return web.json_response({
+            "streams": self.streams,
+            "max_streams": self.max_streams,
+            "pending_segments": self.pool.pending,
+            "rejected": self.rejected,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            **self.pool.stats(),
+        })
+
+    async def transcribe_file(self, request):
+        if self.overloaded():
+            self.rejected += 1
+            return web.json_response({"error": "server busy"}, status=503, headers={"Retry-After": "1"})
+        language = normalize_language(request.query.get("language"))
+        body = await request.read()
+        loop = asyncio.get_running_loop()
+        try:
+            audio = await loop.run_in_executor(None, decode_audio, body, request.query.get("format"))
+        except Exception as e:
+            return web.json_response({"error": f"could not decode audio: {e}"}, status=415)
+
+        start = time.perf_counter()
+        # The VAD loop is CPU bound (~0.1 s per 10 min of audio); keep the
+        # event loop free for the streams meanwhile
+        segments = await loop.run_in_executor(None, segment_audio, audio, RATE, MAX_SEGMENT_SECONDS)
+        futures = [(segment, await self.submit(segment.audio, language)) for segment in segments]
+        output = []
+        detected = language
+        for segment, future in futures:
+            result = await future
+            detected = detected or result.get("language")
+            text = result["text"].strip()
+            if text:
+                output.append({"start": round(segment.start / RATE, 2), "end": round(segment.end / RATE, 2),
+                               "text": text})
+        return web.json_response({
+            "text": " ".join(s["text"] for s in output),
+            "language": detected,
+            "duration": round(len(audio) / RATE, 2),
+            "segments": output,
+            "processing_seconds": round(time.perf_counter() - start, 3),
+        })
+
+    async def stream(self, request):
+        ws = web.WebSocketResponse(max_msg_size=4 * 1024 * 1024)
+        await ws.prepare(request)
+        if self.streams >= self.max_streams or self.overloaded():
+            self.rejected += 1
+            await ws.close(code=WS_TRY_AGAIN_LATER, message=b"server busy")
+            return ws
+        self.streams += 1
+        try:
+            await StreamSession(self, ws, normalize_language(request.query.get("language"))).run()
+        finally:
+            self.streams -= 1
+        return ws
+
+    def make_app(self):
+        app = web.Application(client_max_size=512 * 1024 * 1024)
+        app.add_routes([
+            web.get("/health", self.health),
+            web.get("/stream", self.stream),
+            web.post("/transcribe", self.transcribe_file),
+        ])
+        return app
+
+
+class StreamSession:
+    """One WebSocket client: VAD segmentation, partials and finals."""
+
+    def __init__(self, server, ws, language):
+        self.server = server
+        self.ws = ws
+        self.language = language
+        self.policy = None
+        self.segmenter = VADSegmenter(rate=RATE, max_segment_s=MAX_SEGMENT_SECONDS)
+        self.inflight = []
+        self.partial_task = None
+        self.last_partial = 0.0
+        self.leftover = b""
+
+    def _language(self):
+        if self.language is not None:
+            return self.language
+        if self.policy is None:
+            self.policy = LanguagePolicy()
+        return self.policy.language_for_chunk()
+
+    async def run(self):
+        async for msg in self.ws:
+            if msg.type == WSMsgType.BINARY:
+                await self.on_audio(msg.data)
+            elif msg.type == WSMsgType.TEXT:
+                try:
+                    data = json.loads(msg.data)
+                except ValueError:
+                    data = None
+                if not isinstance(data, dict):
+                    await self.send({"type": "error", "message": "control messages must be JSON objects"})
+                    continue
+                if data.get("type") == "eof":
+                    break
+                if "language" in data:
+                    self.language = normalize_language(data["language"])
+            elif msg.type == WSMsgType.ERROR:
+                return
+        last = self.segmenter.flush()
+        if last is not None:
+            await self.submit(last)
+        if self.partial_task is not None:
+            await self.partial_task
+        for task in self.inflight:
+            await task
+        if not self.ws.closed:
+            await self.ws.send_json({"type": "done"})
+            await self.ws.close()
+
+    async def on_audio(self, data):
+        data = self.leftover + data
+        usable = len(data) - len(data) % 2
+        self.leftover = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+        # Off the event loop, so many concurrent streams don't queue up
+        # behind each other's VAD work; one push at a time per session
+        segments = await asyncio.get_running_loop().run_in_executor(None, self.segmenter.push, samples)
+        for segment in segments:
+            await self.submit(segment)
+        self.maybe_partial()
+
+    async def submit(self, segment):
+        # Per-stream backpressure: stop reading this socket while too many
+        # of its segments are still being decoded
+        self.inflight = [t for t in self.inflight if not t.done()]
+        while len(self.inflight) >= self.server.stream_inflight:
+            await asyncio.wait(self.inflight, return_when=asyncio.FIRST_COMPLETED)
+            self.inflight = [t for t in self.inflight if not t.done()]
+        language = self._language()
+        future = await self.server.submit(segment.audio, language)
+        self.inflight.append(asyncio.ensure_future(self.send_final(segment, future, language)))
+
+    async def send_final(self, segment, future, language):
+        try:
+            result = await future
+        except Exception as e:
+            await self.send({"type": "error", "start": segment.start / RATE, "message": str(e)})
+            return
+        if self.policy is not None:
+            self.policy.observe(result, language)
+        await self.send({
+            "type": "final",
+            "start": round(segment.start / RATE, 2),
+            "end": round(segment.end / RATE, 2),
+            "text": result["text"].strip(),
+            "language": result.get("language"),
+        })
+
+    def maybe_partial(self):
+        # Partials are best effort: one at a time per stream, and none while
+        # the schedulers are backed up with final segments
+        now = time.perf_counter()
+        if (self.server.partial_every <= 0 or now - self.last_partial < self.server.partial_every
+                or (self.partial_task is not None and not self.partial_task.done())
+                or self.server.overloaded()):
+            return
+        segment = self.segmenter.open_segment()
+        if segment is None or len(segment.audio) < RATE // 2:
+            return
+        self.last_partial = now
+        self.partial_task = asyncio.ensure_future(self.send_partial(segment))
+
+    async def send_partial(self, segment):
+        language = self.language or (self.policy.pinned if self.policy else None)
+        try:
+            result = await asyncio.wrap_future(self.server.pool.submit(segment.audio, language=language))
+        except Exception:
+            return  # queue full or decode failed: skip this partial
+        text = result["text"].strip()
+        if text:
+            await self.send({"type": "partial", "start": round(segment.start / RATE, 2), "text": text})
+
+    async def send(self, message):
+        if not self.ws.closed:
+            try:
+                await self.ws.send_json(message)
+            except ConnectionError:
+                pass
+
+
+def normalize_language(language):
+    return None if language in (None, "", "auto") else language
+
+
+def decode_audio(body, fmt=None):
+    """Request body -> float32 16 kHz mono."""
+    if fmt == "pcm16":
+        return np.frombuffer(body[:len(body) - len(body) % 2], dtype=np.int16).astype(np.float32) / 32768.0
+    # load_audio_file resamples and falls back to ffmpeg for other formats
+    fd, path = tempfile.mkstemp(suffix=".audio")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        return load_audio_file(path)
+    finally:
+        os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming Whisper transcription server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--device", default="auto", help="auto/cpu/cuda/cpu-int8")
+    parser.add_argument("--replicas", type=int, default=1, help="model copies, each with its own decode thread")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.1, help="seconds to wait for a batch to fill")
+    parser.add_argument("--max-streams", type=int, default=32)
+    parser.add_argument("--max-pending", type=int, default=64,
+                        help="queued segments beyond which new work is refused")
+    parser.add_argument("--partial-every", type=float, default=1.0,
+                        help="seconds between partial results per stream (0 = finals only)")
+    args = parser.parse_args(argv)
+
+    if web is None:
+        parser.error("the server needs aiohttp: pip install aiohttp")
+
+    log = lambda msg: print(msg, end="", flush=True)
+    schedulers = []
+    for _ in range(args.replicas):
+        # A registry per replica, so each one gets its own copy of the model
+        engine = TranscriptionEngine(args.model, args.device, log=log, registry=ModelRegistry(log=log))
+        engine.load()
+        schedulers.append(BatchScheduler(engine.model, max_batch=args.max_batch, max_wait=args.max_wait,
+                                         fp16=engine.precision == "fp16").start())
+    pool = SchedulerPool(schedulers)
+    server = TranscriptionServer(pool, max_streams=args.max_streams, max_pending=args.max_pending,
+                                 partial_every=args.partial_every)
+    print(f"[Serving on http://{args.host}:{args.port} (ws://{args.host}:{args.port}/stream)]", flush=True)
+    try:
+        web.run_app(server.make_app(), host=args.host, port=args.port, print=None)
+    finally:
+        pool.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
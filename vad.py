@@ -0,0 +1,229 @@
+"""Streaming voice activity detection and speech segmentation.
+
+The segmenter sits between the capture ring buffer and Whisper: it is fed
+arbitrary-sized blocks of 16 kHz float32 audio and emits complete speech
+segments cut at pauses, so silence never reaches ``model.transcribe`` and
+words are not split at fixed chunk boundaries.
+
+Any object with ``is_speech(frame) -> bool`` (frame = float32 samples of
+``frame_ms`` length) can be plugged in as the detector; ``EnergyVAD`` needs
+nothing beyond numpy and ``WebRTCVAD`` wraps the optional ``webrtcvad``
+package.
+"""
+from collections import deque, namedtuple
+
+import numpy as np
+
+# start/end are absolute sample offsets in the stream, audio is float32
+SpeechSegment = namedtuple("SpeechSegment", ["start", "end", "audio"])
+
+
+class EnergyVAD:
+    """Energy / zero-crossing detector with an adaptive noise floor.
+
+    A frame counts as speech when its level is ``margin_db`` above the
+    running noise floor (and above ``min_db``). Frames that look like
+    broadband hiss - very high zero-crossing rate without much energy - are
+    rejected. The noise floor follows quiet frames quickly and loud frames
+    slowly, so it adapts to the room without learning speech as noise.
+    """
+
+    def __init__(self, margin_db=9.0, min_db=-55.0, max_zcr=0.35, initial_floor_db=-60.0):
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.max_zcr = max_zcr
+        self.noise_floor_db = initial_floor_db
+
+    def is_speech(self, frame):
+        energy = float(np.dot(frame, frame)) / max(len(frame), 1)
+        level_db = 10.0 * np.log10(energy + 1e-12)
+        signs = np.signbit(frame)
+        zcr = np.count_nonzero(signs[1:] != signs[:-1]) / max(len(frame) - 1, 1)
+
+        speech = level_db > self.min_db and level_db > self.noise_floor_db + self.margin_db
+        if speech and zcr > self.max_zcr and level_db < self.noise_floor_db + 2 * self.margin_db:
+            speech = False
+
+        # Track the floor: fall fast, rise slowly (and not at all during speech)
+        if level_db < self.noise_floor_db:
+            self.noise_floor_db = 0.7 * self.noise_floor_db + 0.3 * level_db
+        elif not speech:
+            self.noise_floor_db = 0.995 * self.noise_floor_db + 0.005 * level_db
+        return speech
+
+
+class WebRTCVAD:
+    """Adapter for the optional ``webrtcvad`` package (10/20/30 ms frames)."""
+
+    def __init__(self, aggressiveness=2, rate=16000):
+        try:
+            import webrtcvad
+        except ImportError:
+            raise ImportError("WebRTC VAD requires the 'webrtcvad' package: pip install webrtcvad")
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self.rate = rate
+
+    def is_speech(self, frame):
+        pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16)
+        return self._vad.is_speech(pcm.tobytes(), self.rate)
+
+
+def create_vad(name="energy", **kwargs):
+    """Build a detector by name ("energy" or "webrtc")."""
+    if name == "energy":
+        return EnergyVAD(**kwargs)
+    if name == "webrtc":
+        return WebRTCVAD(**kwargs)
+    raise ValueError(f"Unknown VAD: {name}")
+
+
+class VADSegmenter:
+    """Turns a stream of audio blocks into speech segments.
+
+    - ``onset_ms``: consecutive speech needed to open a segment.
+    - ``hangover_ms``: silence needed to close one (short pauses are kept).
+    - ``padding_ms``: audio kept before the onset and after the last speech
+      frame so word edges are not clipped.
+    - ``min_speech_ms``: shorter detections (clicks, coughs) are discarded.
+    - ``max_segment_s``: long monologues are cut here even without a pause.
+    """
+
+    def __init__(self, vad=None, rate=16000, frame_ms=30, onset_ms=90, hangover_ms=600,
+                 padding_ms=200, min_speech_ms=300, max_segment_s=15.0):
+        self.vad = vad if vad is not None else EnergyVAD()
+        self.rate = rate
+        self.frame_ms = frame_ms
+        self.frame_len = rate * frame_ms // 1000
+        self.onset_frames = max(1, onset_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.padding_frames = padding_ms // frame_ms
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_segment_frames = max(self.onset_frames + 1, int(max_segment_s * 1000) // frame_ms)
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._position = 0  # absolute sample offset of the next frame
+        self._preroll = deque(maxlen=self.padding_frames + self.onset_frames)
+        self._active = False
+        self._segment = []
+        self._speech_run = 0
+        self._silence_run = 0
+        self._voiced_frames = 0
+
+        self.frames_total = 0
+        self.frames_speech = 0
+        self.samples_emitted = 0
+
+    @property
+    def in_speech(self):
+        return self._active
+
+    @property
+    def samples_skipped(self):
+        return self.frames_total * self.frame_len - self.samples_emitted
+
+    def open_segment(self):
+        """The speech segment collected so far, or None outside speech."""
+        if not self._active or not self._segment:
+            return None
+        audio = np.concatenate([f for _, f in self._segment])
+        start = self._segment[0][0]
+        return SpeechSegment(start, start + len(audio), audio)
+
+    def set_max_segment(self, seconds):
+        self.max_segment_frames = max(self.onset_frames + 1, int(seconds * 1000) // self.frame_ms)
+
+    def push(self, samples):
+        """Feed a block of audio; returns the list of segments it completed."""
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        n_frames = len(samples) // self.frame_len
+        segments = []
+        for i in range(n_frames):
+            frame = samples[i * self.frame_len:(i + 1) * self.frame_len]
+            segment = self._process_frame(frame)
+            if segment is not None:
+                segments.append(segment)
+        self._pending = np.array(samples[n_frames * self.frame_len:], dtype=np.float32)
+        return segments
+
+    def flush(self):
+        """Close any open segment (e.g. when listening stops)."""
+        segment = None
+        if self._active:
+            segment = self._emit(trim_silence=True)
+        self._pending = np.zeros(0, dtype=np.float32)
+        return segment
+
+    def _process_frame(self, frame):
+        frame_start = self._position
+        self._position += len(frame)
+        self.frames_total += 1
+        speech = self.vad.is_speech(frame)
+        if speech:
+            self.frames_speech += 1
+
+        if not self._active:
+            self._preroll.append((frame_start, frame.copy()))
+            self._speech_run = self._speech_run + 1 if speech else 0
+            if self._speech_run >= self.onset_frames:
+                # Open a segment with the onset frames plus leading padding
+                self._active = True
+                self._segment = list(self._preroll)
+                self._preroll.clear()
+                self._voiced_frames = self._speech_run
+                self._silence_run = 0
+            return None
+
+        self._segment.append((frame_start, frame.copy()))
+        if speech:
+            self._voiced_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+
+        if self._silence_run >= self.hangover_frames:
+            return self._emit(trim_silence=True)
+        if len(self._segment) >= self.max_segment_frames:
+            return self._emit(trim_silence=False, keep_open=True)
+        return None
+
+    def _emit(self, trim_silence, keep_open=False):
+        frames = self._segment
+        if trim_silence:
+            # Keep only `padding` frames of the trailing silence
+            drop = max(0, self._silence_run - self.padding_frames)
+            if drop:
+                frames = frames[:-drop]
+        voiced = self._voiced_frames
+
+        # A forced cut mid-speech continues straight into the next segment
+        self._active = keep_open
+        self._segment = []
+        self._speech_run = 0
+        self._silence_run = 0
+        self._voiced_frames = 0
+        self._preroll.clear()
+
+        if voiced < self.min_speech_frames or not frames:
+            return None
+        audio = np.concatenate([f for _, f in frames])
+        start = frames[0][0]
+        self.samples_emitted += len(audio)
+        return SpeechSegment(start, start + len(audio), audio)
+
+
+def segment_audio(audio, rate=16000, max_segment_seconds=15.0, vad=None, block_seconds=0.25):
+    """Speech segments of a whole recording, cut as the live path would.
+
+    The audio is fed in ``block_seconds`` blocks (what the app reads from
+    the capture ring) and the segment still open at the end is flushed.
+    """
+    segmenter = VADSegmenter(vad=vad, rate=rate, max_segment_s=max_segment_seconds)
+    block = int(rate * block_seconds)
+    segments = []
+    for i in range(0, len(audio), block):
+        segments.extend(segmenter.push(audio[i:i + block]))
+    last = segmenter.flush()
+    if last is not None:
+        segments.append(last)
+    return segments